@@ -0,0 +1,239 @@
+import argparse
+import asyncio
+import statistics
+import time
+import tracemalloc
+from collections.abc import AsyncIterator, Callable, Iterator
+from dataclasses import dataclass, field
+from typing import Annotated, Any
+
+from aiogram import Bot, Dispatcher, F, Router
+from aiogram.enums import ChatType
+from aiogram.types import CallbackQuery, Chat, Message, Update, User
+
+from aiogram3_di import Depends, setup_di
+
+
+def get_user_id(event_from_user: User) -> int:
+    return event_from_user.id
+
+
+async def get_user_id_async(event_from_user: User) -> int:
+    return event_from_user.id
+
+
+async def get_user_id_async_gen(event_from_user: User) -> AsyncIterator[int]:
+    yield event_from_user.id
+
+
+def get_user_id_gen(event_from_user: User) -> Iterator[int]:
+    yield event_from_user.id
+
+
+async def get_user_id_override(event_from_user: User) -> int:
+    return -event_from_user.id
+
+
+def make_chain(depth: int) -> Callable[..., Any]:
+    async def level_0(event_from_user: User) -> int:
+        return event_from_user.id
+
+    call = level_0
+    for _ in range(depth - 1):
+
+        async def level(value: Annotated[int, Depends(call)]) -> int:
+            return value + 1
+
+        call = level
+    return call
+
+
+deep_chain = make_chain(8)
+
+
+async def no_dependencies(event: Message | CallbackQuery) -> None:
+    pass
+
+
+async def shallow(
+    event: Message | CallbackQuery,
+    user_id: Annotated[int, Depends(get_user_id_async)],
+) -> None:
+    pass
+
+
+async def deep(
+    event: Message | CallbackQuery,
+    value: Annotated[int, Depends(deep_chain)],
+) -> None:
+    pass
+
+
+async def sync_thread(
+    event: Message | CallbackQuery,
+    user_id: Annotated[int, Depends(get_user_id)],
+) -> None:
+    pass
+
+
+async def sync_inline(
+    event: Message | CallbackQuery,
+    user_id: Annotated[int, Depends(get_user_id, run="inline")],
+) -> None:
+    pass
+
+
+async def async_generator(
+    event: Message | CallbackQuery,
+    user_id: Annotated[int, Depends(get_user_id_async_gen)],
+) -> None:
+    pass
+
+
+async def sync_generator(
+    event: Message | CallbackQuery,
+    user_id: Annotated[int, Depends(get_user_id_gen)],
+) -> None:
+    pass
+
+
+async def cache_hit(
+    event: Message | CallbackQuery,
+    a: Annotated[int, Depends(get_user_id_async)],
+    b: Annotated[int, Depends(get_user_id_async)],
+    c: Annotated[int, Depends(get_user_id_async)],
+    d: Annotated[int, Depends(get_user_id_async)],
+) -> None:
+    pass
+
+
+async def cache_miss(
+    event: Message | CallbackQuery,
+    a: Annotated[int, Depends(get_user_id_async, use_cache=False)],
+    b: Annotated[int, Depends(get_user_id_async, use_cache=False)],
+    c: Annotated[int, Depends(get_user_id_async, use_cache=False)],
+    d: Annotated[int, Depends(get_user_id_async, use_cache=False)],
+) -> None:
+    pass
+
+
+@dataclass(frozen=True, slots=True)
+class Scenario:
+    name: str
+    handler: Callable[..., Any]
+    setup_kwargs: dict[str, Any] = field(default_factory=dict)
+
+
+SCENARIOS = (
+    Scenario("no dependencies", no_dependencies),
+    Scenario("shallow async", shallow),
+    Scenario("deep async (8)", deep),
+    Scenario("sync thread", sync_thread),
+    Scenario("sync inline", sync_inline),
+    Scenario("async generator", async_generator),
+    Scenario("sync generator", sync_generator),
+    Scenario("cache hit (4)", cache_hit),
+    Scenario("cache miss (4)", cache_miss),
+    Scenario(
+        "overrides on",
+        shallow,
+        {"dependency_overrides": {get_user_id_async: get_user_id_override}},
+    ),
+    Scenario("graph concurrency", cache_miss, {"concurrency": "graph"}),
+)
+
+
+def make_updates() -> dict[str, Update]:
+    user = User(id=42, is_bot=False, first_name="Vladyslav")
+    chat = Chat(id=42, type=ChatType.PRIVATE)
+    message = Message(message_id=1, date=0, chat=chat, from_user=user, text="hi")
+    return {
+        "message": Update(update_id=1, message=message),
+        "callback_query": Update(
+            update_id=2,
+            callback_query=CallbackQuery(
+                id="1", from_user=user, chat_instance="1", message=message, data="x"
+            ),
+        ),
+    }
+
+
+@dataclass(frozen=True, slots=True)
+class Result:
+    updates_per_second: float
+    p50: float
+    p99: float
+    peak_bytes: float
+
+
+async def run_scenario(
+    scenario: Scenario, update: Update, *, updates: int, warmup: int
+) -> Result:
+    router = Router()
+    router.message.register(scenario.handler)
+    router.callback_query.register(scenario.handler, F.data)
+
+    dp = Dispatcher()
+    dp.include_router(router)
+    setup_di(dp, **scenario.setup_kwargs)
+    bot = Bot("42:TEST")
+
+    for _ in range(warmup):
+        await dp.feed_update(bot, update)
+
+    latencies: list[int] = []
+    started_at = time.perf_counter_ns()
+    for _ in range(updates):
+        update_started_at = time.perf_counter_ns()
+        await dp.feed_update(bot, update)
+        latencies.append(time.perf_counter_ns() - update_started_at)
+    elapsed = time.perf_counter_ns() - started_at
+
+    tracemalloc.start()
+    peaks: list[int] = []
+    for _ in range(min(updates, 200)):
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        await dp.feed_update(bot, update)
+        peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    tracemalloc.stop()
+
+    await dp.emit_shutdown()
+    await bot.session.close()
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return Result(
+        updates_per_second=updates / (elapsed / 1e9),
+        p50=quantiles[49] / 1e3,
+        p99=quantiles[98] / 1e3,
+        peak_bytes=statistics.median(peaks),
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the DI middleware.")
+    parser.add_argument("--updates", type=int, default=5000)
+    parser.add_argument("--warmup", type=int, default=500)
+    parser.add_argument("-k", "--filter", default="", help="scenario name filter")
+    args = parser.parse_args()
+
+    print(
+        f"{'scenario':<22} {'update':<15} {'updates/s':>10} "
+        f"{'p50 us':>8} {'p99 us':>8} {'peak B':>8}"
+    )
+    for scenario in SCENARIOS:
+        if args.filter not in scenario.name:
+            continue
+        for update_type, update in make_updates().items():
+            result = await run_scenario(
+                scenario, update, updates=args.updates, warmup=args.warmup
+            )
+            print(
+                f"{scenario.name:<22} {update_type:<15} "
+                f"{result.updates_per_second:>10.0f} {result.p50:>8.1f} "
+                f"{result.p99:>8.1f} {result.peak_bytes:>8.0f}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
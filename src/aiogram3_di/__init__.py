@@ -1,14 +1,41 @@
 __all__ = (
+    "BatchDepends",
     "Depends",
     "DIManager",
+    "DependencyExecutor",
+    "DependencyCycleError",
+    "DependencyGraphError",
+    "DependencyTimeoutError",
+    "DependencyObserver",
+    "MetricsObserver",
+    "TracingObserver",
+    "GraphIssue",
+    "Injected",
+    "Pooled",
+    "ResourcePool",
+    "add_dependencies",
+    "inject",
     "setup_di",
+    "validate_graph",
     "__version__",
 )
 
 from importlib.metadata import version as _version
 
+from .batch import BatchDepends
 from .depends import Depends
+from .exceptions import (
+    DependencyCycleError,
+    DependencyGraphError,
+    DependencyTimeoutError,
+)
+from .executor import DependencyExecutor
+from .inject import Injected, inject
 from .manager import DIManager
+from .observers import DependencyObserver, MetricsObserver, TracingObserver
+from .pool import Pooled, ResourcePool
+from .routing import add_dependencies
 from .setup import setup_di
+from .validation import GraphIssue, validate_graph
 
 __version__ = _version("aiogram3-di")
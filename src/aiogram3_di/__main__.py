@@ -0,0 +1,5 @@
+import sys
+
+from aiogram3_di.validation import main
+
+sys.exit(main())
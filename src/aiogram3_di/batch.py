@@ -0,0 +1,117 @@
+import asyncio
+import inspect
+from collections.abc import Awaitable, Callable, Hashable, Mapping, Sequence
+from typing import Any
+
+from .depends import Depends
+
+Loader = Callable[[list[Any]], Awaitable[Mapping[Any, Any] | Sequence[Any]]]
+
+
+class BatchLoader:
+    __slots__ = (
+        "_loader",
+        "_key",
+        "_max_batch_size",
+        "_max_delay",
+        "_pending",
+        "_handle",
+        "_tasks",
+        "__signature__",
+        "__weakref__",
+    )
+
+    def __init__(
+        self,
+        loader: Loader,
+        *,
+        key: Callable[..., Hashable],
+        max_batch_size: int = 100,
+        max_delay: float = 0.005,
+    ) -> None:
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be greater than 0")
+        if max_delay < 0:
+            raise ValueError("max_delay cannot be negative")
+
+        self._loader = loader
+        self._key = key
+        self._max_batch_size = max_batch_size
+        self._max_delay = max_delay
+        self._pending: dict[Hashable, asyncio.Future[Any]] = {}
+        self._handle: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+        # The dependency takes the same parameters as the key function.
+        self.__signature__ = inspect.signature(key).replace(
+            return_annotation=inspect.Signature.empty
+        )
+
+    async def __call__(self, **kwargs: Any) -> Any:
+        return await self.load(self._key(**kwargs))
+
+    async def load(self, key: Hashable) -> Any:
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._pending[key] = loop.create_future()
+            if len(self._pending) >= self._max_batch_size:
+                self._dispatch()
+            elif self._handle is None:
+                self._handle = loop.call_later(self._max_delay, self._dispatch)
+        # Other updates wait for the same key, so a cancelled one must not
+        # cancel the batch.
+        return await asyncio.shield(future)
+
+    def _dispatch(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        batch, self._pending = self._pending, {}
+        task = asyncio.get_running_loop().create_task(self._load(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _load(self, batch: dict[Hashable, asyncio.Future[Any]]) -> None:
+        keys = list(batch)
+        error: Exception | None = None
+        try:
+            values = await self._loader(keys)
+            if not isinstance(values, Mapping):
+                if len(values) != len(keys):
+                    raise ValueError(
+                        f"{self._loader!r} returned {len(values)} values "
+                        f"for {len(keys)} keys"
+                    )
+                values = dict(zip(keys, values))
+        except Exception as e:
+            error = e
+        except BaseException:
+            for future in batch.values():
+                future.cancel()
+            raise
+
+        for key, future in batch.items():
+            if future.done():
+                continue
+            if error is None and key in values:
+                future.set_result(values[key])
+                continue
+            future.set_exception(KeyError(key) if error is None else error)
+            # Mark the exception as retrieved when there are no waiters.
+            future.exception()
+
+
+def BatchDepends(
+    loader: Loader,
+    *,
+    key: Callable[..., Hashable],
+    max_batch_size: int = 100,
+    max_delay: float = 0.005,
+    **options: Any,
+) -> Depends:
+    return Depends(
+        BatchLoader(
+            loader, key=key, max_batch_size=max_batch_size, max_delay=max_delay
+        ),
+        **options,
+    )
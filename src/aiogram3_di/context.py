@@ -0,0 +1,34 @@
+from contextlib import AsyncExitStack
+from types import TracebackType
+from typing import Any
+
+from .scopes import CallKey
+
+
+class UpdateContext:
+    # Dependencies resolved for one update, shared by its filters,
+    # middlewares and handler.
+    __slots__ = ("values", "_stack")
+
+    def __init__(self) -> None:
+        self.values: dict[CallKey, Any] = {}
+        self._stack: AsyncExitStack | None = None
+
+    @property
+    def stack(self) -> AsyncExitStack:
+        if self._stack is None:
+            self._stack = AsyncExitStack()
+        return self._stack
+
+    async def __aenter__(self) -> "UpdateContext":
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> bool:
+        if self._stack is None:
+            return False
+        return await self._stack.__aexit__(exc_type, exc_value, traceback)
@@ -1,9 +1,44 @@
 from dataclasses import dataclass, field
-from collections.abc import Callable
-from typing import Any
+from collections.abc import Callable, Hashable
+from typing import Any, Literal, TypeAlias
+
+Run: TypeAlias = Literal["inline", "thread", "process"]
+Scope: TypeAlias = Literal["app", "chat", "user", "update"]
+Teardown: TypeAlias = Literal["inline", "background"]
+
+# Default of Depends.fallback: a timed out dependency raises instead.
+MISSING: Any = object()
 
 
 @dataclass(frozen=True, slots=True)
 class Depends:
     func: Callable[..., Any] | None = None
     use_cache: bool = field(default=True, kw_only=True)
+    run: Run | None = field(default=None, kw_only=True)
+    scope: Scope = field(default="update", kw_only=True)
+    cache_ttl: float | None = field(default=None, kw_only=True)
+    cache_key: Callable[..., Hashable] | None = field(default=None, kw_only=True)
+    teardown: Teardown = field(default="inline", kw_only=True)
+    timeout: float | None = field(default=None, kw_only=True)
+    fallback: Any = field(default=MISSING, kw_only=True)
+
+    def __post_init__(self) -> None:
+        if self.run is not None and self.run not in ("inline", "thread", "process"):
+            raise ValueError(f"`{self.run}` is not a valid run policy")
+        if self.scope not in ("app", "chat", "user", "update"):
+            raise ValueError(f"`{self.scope}` is not a valid scope")
+        if self.cache_ttl is not None:
+            if self.cache_ttl <= 0:
+                raise ValueError("cache_ttl must be greater than 0")
+            if self.scope != "update":
+                raise ValueError("cache_ttl cannot be used with a non-update scope")
+        elif self.cache_key is not None:
+            raise ValueError("cache_key cannot be used without cache_ttl")
+        if self.teardown not in ("inline", "background"):
+            raise ValueError(f"`{self.teardown}` is not a valid teardown mode")
+        if self.teardown == "background" and (
+            self.scope != "update" or self.cache_ttl is not None
+        ):
+            raise ValueError("background teardown can only be used per update")
+        if self.timeout is not None and self.timeout <= 0:
+            raise ValueError("timeout must be greater than 0")
@@ -0,0 +1,22 @@
+from collections.abc import Callable, Sequence
+from typing import Any
+
+
+class DependencyTimeoutError(TimeoutError):
+    def __init__(self, call: Callable[..., Any], timeout: float) -> None:
+        super().__init__(f"{call!r} did not finish in {timeout} seconds")
+        self.call = call
+        self.timeout = timeout
+
+
+class DependencyGraphError(ValueError):
+    def __init__(self, errors: Sequence[str]) -> None:
+        super().__init__("\n".join(errors))
+        self.errors = tuple(errors)
+
+
+class DependencyCycleError(ValueError):
+    def __init__(self, path: Sequence[Callable[..., Any]]) -> None:
+        names = (getattr(call, "__qualname__", None) or repr(call) for call in path)
+        super().__init__("dependency cycle: " + " -> ".join(names))
+        self.path = tuple(path)
@@ -0,0 +1,143 @@
+import asyncio
+import contextvars
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass(frozen=True, slots=True)
+class ExecutorStats:
+    queue_depth: int
+    active_workers: int
+    completed: int
+    total_wait_time: float
+    max_wait_time: float
+
+
+class DependencyExecutor:
+    __slots__ = (
+        "_executor",
+        "_owns_executor",
+        "_max_workers",
+        "_semaphore",
+        "_lock",
+        "_queue_depth",
+        "_active_workers",
+        "_completed",
+        "_total_wait_time",
+        "_max_wait_time",
+    )
+
+    def __init__(
+        self,
+        *,
+        max_workers: int | None = None,
+        max_queue_size: int | None = None,
+        executor: ThreadPoolExecutor | None = None,
+    ) -> None:
+        if executor is not None and max_workers is not None:
+            raise ValueError("max_workers cannot be used with an existing executor")
+        if max_queue_size is not None and max_queue_size < 1:
+            raise ValueError("max_queue_size must be greater than 0")
+
+        self._owns_executor = executor is None
+        self._max_workers = max_workers
+        self._executor = executor or self._create_executor()
+        self._semaphore = (
+            asyncio.Semaphore(max_queue_size) if max_queue_size is not None else None
+        )
+        self._lock = threading.Lock()
+        self._queue_depth = 0
+        self._active_workers = 0
+        self._completed = 0
+        self._total_wait_time = 0.0
+        self._max_wait_time = 0.0
+
+    @property
+    def stats(self) -> ExecutorStats:
+        with self._lock:
+            return ExecutorStats(
+                queue_depth=self._queue_depth,
+                active_workers=self._active_workers,
+                completed=self._completed,
+                total_wait_time=self._total_wait_time,
+                max_wait_time=self._max_wait_time,
+            )
+
+    async def run(self, func: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        submitted_at = time.perf_counter()
+
+        with self._lock:
+            self._queue_depth += 1
+
+        if self._semaphore is not None:
+            try:
+                await self._semaphore.acquire()
+            except BaseException:
+                with self._lock:
+                    self._queue_depth -= 1
+                raise
+
+        try:
+            future = self._executor.submit(
+                self._call, loop, submitted_at, context.run, func, *args, **kwargs
+            )
+        except BaseException:
+            self._release()
+            raise
+
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            if future.cancel():
+                self._release()
+            raise
+
+    def shutdown(self, *, wait: bool = True) -> None:
+        if self._owns_executor:
+            self._executor.shutdown(wait=wait)
+            # A dispatcher can be started again after shutdown, so the owned
+            # pool is replaced instead of leaving a dead one behind.
+            self._executor = self._create_executor()
+
+    def _create_executor(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(
+            max_workers=self._max_workers, thread_name_prefix="aiogram3_di"
+        )
+
+    def _release(self) -> None:
+        with self._lock:
+            self._queue_depth -= 1
+        if self._semaphore is not None:
+            self._semaphore.release()
+
+    def _call(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        submitted_at: float,
+        func: Callable[..., Any],
+        /,
+        *args: Any,
+        **kwargs: Any,
+    ) -> Any:
+        wait_time = time.perf_counter() - submitted_at
+        with self._lock:
+            self._queue_depth -= 1
+            self._active_workers += 1
+            self._total_wait_time += wait_time
+            self._max_wait_time = max(self._max_wait_time, wait_time)
+
+        if self._semaphore is not None:
+            loop.call_soon_threadsafe(self._semaphore.release)
+
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._active_workers -= 1
+                self._completed += 1
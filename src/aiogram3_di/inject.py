@@ -0,0 +1,50 @@
+import inspect
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any
+
+from aiogram.dispatcher.event.handler import FilterObject, HandlerObject
+from aiogram.filters import Filter
+from aiogram.types import TelegramObject
+
+from .context import UpdateContext
+from .resolver import DependenciesResolver
+
+if TYPE_CHECKING:
+    from .manager import DIManager
+
+
+class Injected(Filter):
+    __slots__ = ("_filter", "_handler")
+
+    def __init__(self, call: Callable[..., Any]) -> None:
+        self._filter = FilterObject(call)
+        # Plans are compiled from the annotations of the function itself,
+        # not of the filter class.
+        if not (inspect.isfunction(call) or inspect.ismethod(call)):
+            call = call.__call__
+        self._handler = HandlerObject(call)
+
+    async def __call__(self, event: TelegramObject, /, **data: Any) -> Any:
+        di_manager: DIManager = data["di_manager"]
+        plan = di_manager.get_plan(self._handler, ())
+        if plan.nodes:
+            context: UpdateContext | None = data.get("di_context")
+            if context is None:
+                raise RuntimeError(
+                    f"{self._filter.callback!r} can only be called for updates "
+                    "fed to a dispatcher set up with setup_di"
+                )
+            resolver = DependenciesResolver(
+                context.stack,
+                handler_dependencies=(),
+                event=event,
+                middleware_data=data,
+                shared=context.values,
+            )
+            # `data` is this call's own copy of aiogram's data.
+            data.update(await resolver.resolve_values(plan))
+        return await self._filter.call(event, **data)
+
+
+def inject(call: Callable[..., Any]) -> Injected:
+    return Injected(call)
@@ -1,23 +1,308 @@
-from collections.abc import Callable
-from typing import Any
+import asyncio
+from collections import ChainMap
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import AsyncExitStack, contextmanager
+from contextvars import ContextVar
+from typing import Any, Literal, TypeAlias
+
+from aiogram import Router
+from aiogram.dispatcher.event.handler import HandlerObject
+
+from .depends import Depends, Run, Scope
+from .exceptions import DependencyGraphError
+from .executor import DependencyExecutor
+from .observers import DependencyObserver
+from .overrides import DependencyOverrides
+from .plan import DependencyPlan, compile_plan
+from .providers import ProviderRegistry
+from .resolver import DependenciesResolver
+from .routing import declarations, get_handler_dependencies
+from .scopes import CallKey, ScopeStore
+from .teardown import BackgroundTeardown
+from .utils import get_callable_name
+
+Concurrency: TypeAlias = Literal["sequential", "graph"]
+Plans: TypeAlias = dict[int, tuple[HandlerObject, tuple[Depends, ...], DependencyPlan]]
+
+# Plans compiled for override contexts that are no longer used are dropped
+# once there are more contexts than this.
+MAX_OVERRIDE_CONTEXTS = 64
 
 
 class DIManager:
-    __slots__ = "_dependency_overrides"
+    __slots__ = (
+        "_dependency_overrides",
+        "_concurrency",
+        "_run",
+        "_timeout",
+        "_executor",
+        "_process_executor",
+        "_owns_process_executor",
+        "_process_workers",
+        "_scopes",
+        "_cache",
+        "_observers",
+        "_teardown",
+        "_plans",
+        "_plans_version",
+        "_declarations_version",
+        "_providers",
+        "_providers_version",
+        "_override_context",
+        "_override_plans",
+    )
 
     def __init__(
         self,
         *,
-        dependency_overrides: dict[Callable[..., Any], Callable[..., Any]],
+        dependency_overrides: Mapping[Callable[..., Any], Callable[..., Any]],
+        concurrency: Concurrency = "sequential",
+        run: Run = "thread",
+        timeout: float | None = None,
+        executor: DependencyExecutor | None = None,
+        process_executor: ProcessPoolExecutor | None = None,
+        process_workers: int | None = None,
+        scope_max_size: int | None = 1024,
+        scope_ttl: float | None = None,
+        cache_max_size: int | None = 1024,
+        observers: Sequence[DependencyObserver] = (),
+        teardown_max_pending: int | None = 1000,
+        teardown_timeout: float | None = 30,
     ) -> None:
-        self._dependency_overrides = dependency_overrides
+        self._dependency_overrides = DependencyOverrides(dependency_overrides)
+        self._concurrency = concurrency
+        self._run = run
+        self._timeout = timeout
+        if process_executor is not None and process_workers is not None:
+            raise ValueError(
+                "process_workers cannot be used with an existing process_executor"
+            )
+
+        self._executor = executor
+        self._owns_process_executor = process_executor is None
+        self._process_workers = process_workers
+        self._process_executor = process_executor
+        self._scopes: dict[Scope, ScopeStore] = {
+            "app": ScopeStore(),
+            "chat": ScopeStore(max_size=scope_max_size, ttl=scope_ttl),
+            "user": ScopeStore(max_size=scope_max_size, ttl=scope_ttl),
+        }
+        self._cache = ScopeStore(max_size=cache_max_size)
+        self._observers = tuple(observers)
+        self._teardown = BackgroundTeardown(
+            max_pending=teardown_max_pending, timeout=teardown_timeout
+        )
+        self._plans: Plans = {}
+        self._plans_version = 0
+        self._declarations_version = declarations.version
+        self._providers = ProviderRegistry()
+        self._providers_version = 0
+        self._override_context: ContextVar[
+            tuple[frozenset[tuple[CallKey, CallKey]], Mapping[Any, Any]] | None
+        ] = ContextVar("override_context", default=None)
+        self._override_plans: dict[frozenset[tuple[CallKey, CallKey]], Plans] = {}
 
     @property
-    def dependency_overrides(self) -> dict[Callable[..., Any], Callable[..., Any]]:
+    def dependency_overrides(self) -> DependencyOverrides:
         return self._dependency_overrides
 
     @dependency_overrides.setter
     def dependency_overrides(
-        self, value: dict[Callable[..., Any], Callable[..., Any]]
+        self, value: Mapping[Callable[..., Any], Callable[..., Any]]
+    ) -> None:
+        self._dependency_overrides = DependencyOverrides(value)
+        self._plans.clear()
+        self._override_plans.clear()
+
+    @property
+    def concurrency(self) -> Concurrency:
+        return self._concurrency
+
+    @property
+    def run(self) -> Run:
+        return self._run
+
+    @property
+    def timeout(self) -> float | None:
+        return self._timeout
+
+    @property
+    def executor(self) -> DependencyExecutor | None:
+        return self._executor
+
+    @property
+    def process_executor(self) -> ProcessPoolExecutor:
+        # Created, and its worker processes started, by the first dependency
+        # run in a process.
+        if self._process_executor is None:
+            self._process_executor = ProcessPoolExecutor(
+                max_workers=self._process_workers
+            )
+        return self._process_executor
+
+    @property
+    def scopes(self) -> dict[Scope, ScopeStore]:
+        return self._scopes
+
+    @property
+    def cache(self) -> ScopeStore:
+        return self._cache
+
+    @property
+    def observers(self) -> tuple[DependencyObserver, ...]:
+        return self._observers
+
+    @property
+    def teardown(self) -> BackgroundTeardown:
+        return self._teardown
+
+    def register(
+        self,
+        type_: Any,
+        provider: Callable[..., Any] | None = None,
+        /,
+        *,
+        scope: Scope = "update",
+        **options: Any,
     ) -> None:
-        self._dependency_overrides = value
+        # `Depends()` without a function, annotated with `type_` or a type
+        # it implements, resolves to `provider`, or to `type_` itself.
+        self._providers.register(
+            type_, Depends(provider or type_, scope=scope, **options)
+        )
+
+    @contextmanager
+    def override(
+        self, overrides: Mapping[Callable[..., Any], Callable[..., Any]]
+    ) -> Iterator[None]:
+        # Overrides for the current context only, such as a test or the
+        # updates of a canary middleware. Nested contexts extend outer ones.
+        context = self._override_context.get()
+        if context is not None:
+            overrides = {**context[1], **overrides}
+        key = frozenset(
+            (CallKey(call), CallKey(override)) for call, override in overrides.items()
+        )
+        token = self._override_context.set((key, overrides))
+        try:
+            yield
+        finally:
+            self._override_context.reset(token)
+
+    def get_handler_plan(
+        self, handler: HandlerObject, router: Router
+    ) -> DependencyPlan:
+        # Router, observer and flag dependencies of a handler are looked up
+        # only when its plan is compiled, not on every update.
+        plans, dependency_overrides = self._get_plans()
+        entry = plans.get(id(handler))
+        if entry is not None and entry[0] is handler:
+            return entry[2]
+
+        handler_dependencies = get_handler_dependencies(router, handler)
+        return self._compile_plan(
+            plans, dependency_overrides, handler, handler_dependencies
+        )
+
+    def get_plan(
+        self, handler: HandlerObject, handler_dependencies: tuple[Depends, ...]
+    ) -> DependencyPlan:
+        plans, dependency_overrides = self._get_plans()
+        entry = plans.get(id(handler))
+        if entry is not None and entry[1] == handler_dependencies:
+            return entry[2]
+
+        return self._compile_plan(
+            plans, dependency_overrides, handler, handler_dependencies
+        )
+
+    def _get_plans(self) -> tuple[Plans, Mapping[Any, Any]]:
+        # Plans are compiled against the overrides, the declared dependencies
+        # and the registered providers, so any change invalidates every plan.
+        if (
+            self._plans_version != self._dependency_overrides.version
+            or self._declarations_version != declarations.version
+            or self._providers_version != self._providers.version
+        ):
+            self._plans.clear()
+            self._override_plans.clear()
+            self._plans_version = self._dependency_overrides.version
+            self._declarations_version = declarations.version
+            self._providers_version = self._providers.version
+
+        context = self._override_context.get()
+        if context is None:
+            return self._plans, self._dependency_overrides
+        return (
+            self._get_override_plans(context[0]),
+            ChainMap(context[1], self._dependency_overrides),
+        )
+
+    def _compile_plan(
+        self,
+        plans: Plans,
+        dependency_overrides: Mapping[Any, Any],
+        handler: HandlerObject,
+        handler_dependencies: tuple[Depends, ...],
+    ) -> DependencyPlan:
+        plan = compile_plan(
+            handler,
+            handler_dependencies,
+            dependency_overrides,
+            default_run=self._run,
+            default_timeout=self._timeout,
+            providers=self._providers,
+        )
+        plans[id(handler)] = (handler, handler_dependencies, plan)
+        return plan
+
+    def _get_override_plans(self, key: frozenset[tuple[CallKey, CallKey]]) -> Plans:
+        plans = self._override_plans.pop(key, None)
+        if plans is None:
+            plans = {}
+            if len(self._override_plans) >= MAX_OVERRIDE_CONTEXTS:
+                del self._override_plans[next(iter(self._override_plans))]
+        # Reinserted to keep the most recently used contexts last.
+        self._override_plans[key] = plans
+        return plans
+
+    def compile_plans(self, router: Router, update_types: Iterable[str]) -> None:
+        errors: list[str] = []
+        for update_type in update_types:
+            for sub_router in router.chain_tail:
+                for handler in sub_router.observers[update_type].handlers:
+                    try:
+                        self.get_handler_plan(handler, sub_router)
+                    except Exception as e:
+                        errors.append(f"{get_callable_name(handler.callback)}: {e}")
+        if errors:
+            raise DependencyGraphError(errors)
+
+    async def warmup(self, data: Mapping[str, Any]) -> None:
+        # App scoped dependencies that can be created from `data` alone are
+        # created now instead of on the first update that needs them.
+        async with AsyncExitStack() as stack:
+            resolver = DependenciesResolver(
+                stack,
+                handler_dependencies=(),
+                event=None,
+                middleware_data={**data, "di_manager": self},
+            )
+            for _, _, plan in list(self._plans.values()):
+                await resolver.warmup(plan)
+
+    async def close(self) -> None:
+        await self._teardown.drain()
+        await self._cache.close()
+        for scope in ("user", "chat", "app"):
+            await self._scopes[scope].close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        if self._owns_process_executor and self._process_executor is not None:
+            # Running calls finish and queued ones are cancelled. A dispatcher
+            # can be started again, so the next pool is created on demand.
+            process_executor, self._process_executor = self._process_executor, None
+            await asyncio.to_thread(
+                process_executor.shutdown, wait=True, cancel_futures=True
+            )
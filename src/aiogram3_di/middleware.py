@@ -3,11 +3,17 @@ from contextlib import AsyncExitStack
 from typing import Any
 
 from aiogram import BaseMiddleware
-from aiogram.dispatcher.flags import get_flag
 from aiogram.types import TelegramObject
 
+from .context import UpdateContext
+from .depends import MISSING
+from .manager import DIManager
 from .resolver import DependenciesResolver
 
+# Passed to resolvers of plans that have nothing to tear down, so nothing is
+# ever registered on it.
+_NO_TEARDOWN = AsyncExitStack()
+
 
 class DIMiddleware(BaseMiddleware):
     async def __call__(
@@ -16,14 +22,66 @@ class DIMiddleware(BaseMiddleware):
         event: TelegramObject,
         data: dict[str, Any],
     ) -> Any:
-        handler_dependencies = tuple(get_flag(data, "dependencies", default=()))
+        di_manager: DIManager = data["di_manager"]
+        plan = di_manager.get_handler_plan(data["handler"], data["event_router"])
+        if not plan.nodes:
+            return await handler(event, data)
+
+        context: UpdateContext | None = data.get("di_context")
+        shared = context.values if context is not None else None
+        if not plan.has_teardown:
+            resolver = DependenciesResolver(
+                _NO_TEARDOWN,
+                handler_dependencies=(),
+                event=event,
+                middleware_data=data,
+                shared=shared,
+            )
+            values = await resolver.resolve_values(plan)
+            return await _call_handler(handler, event, data, values)
 
         async with AsyncExitStack() as stack:
             resolver = DependenciesResolver(
                 stack,
-                handler_dependencies=handler_dependencies,
+                handler_dependencies=(),
                 event=event,
-                middleware_data=data.copy(),
+                middleware_data=data,
+                shared=shared,
             )
-            data = await resolver.resolve()
+            values = await resolver.resolve_values(plan)
+            return await _call_handler(handler, event, data, values)
+
+
+class DIContextMiddleware(BaseMiddleware):
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        # Generator dependencies of filters and middlewares are torn down
+        # when the whole update has been handled.
+        async with UpdateContext() as context:
+            data["di_context"] = context
             return await handler(event, data)
+
+
+async def _call_handler(
+    handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+    event: TelegramObject,
+    data: dict[str, Any],
+    values: dict[str, Any],
+) -> Any:
+    # Injected values are written over aiogram's data instead of copying it,
+    # and rolled back afterwards, because aiogram passes the same data to the
+    # next handler when this one is skipped.
+    previous = {param_name: data.get(param_name, MISSING) for param_name in values}
+    data.update(values)
+    try:
+        return await handler(event, data)
+    finally:
+        for param_name, value in previous.items():
+            if value is MISSING:
+                data.pop(param_name, None)
+            else:
+                data[param_name] = value
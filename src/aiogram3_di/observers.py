@@ -0,0 +1,248 @@
+import logging
+import time
+from contextlib import AbstractAsyncContextManager, AbstractContextManager
+from types import TracebackType
+from typing import Any
+
+from .plan import DependencyNode
+from .utils import get_callable_name
+
+logger = logging.getLogger(__name__)
+
+# Label names of the histograms passed to MetricsObserver.
+DURATION_LABELS = ("dependency", "kind", "run", "cache_hit")
+TEARDOWN_LABELS = ("dependency", "kind", "run")
+
+
+def notify_start(
+    observers: tuple["DependencyObserver", ...], node: DependencyNode
+) -> list[Any]:
+    states: list[Any] = []
+    for observer in observers:
+        try:
+            states.append(observer.on_dependency_start(node))
+        except Exception:
+            logger.exception("Dependency observer %r failed", observer)
+            states.append(None)
+    return states
+
+
+def notify_end(
+    observers: tuple["DependencyObserver", ...],
+    node: DependencyNode,
+    states: list[Any],
+    *,
+    duration: float,
+    cache_hit: bool,
+    error: BaseException | None,
+) -> None:
+    for observer, state in zip(observers, states):
+        try:
+            observer.on_dependency_end(
+                node, state, duration=duration, cache_hit=cache_hit, error=error
+            )
+        except Exception:
+            logger.exception("Dependency observer %r failed", observer)
+
+
+def notify_teardown(
+    observers: tuple["DependencyObserver", ...],
+    node: DependencyNode,
+    *,
+    duration: float,
+    error: BaseException | None,
+) -> None:
+    for observer in observers:
+        try:
+            observer.on_teardown(node, duration=duration, error=error)
+        except Exception:
+            logger.exception("Dependency observer %r failed", observer)
+
+
+class DependencyObserver:
+    __slots__ = ()
+
+    def on_dependency_start(self, node: DependencyNode) -> Any:
+        return None
+
+    def on_dependency_end(
+        self,
+        node: DependencyNode,
+        state: Any,
+        *,
+        duration: float,
+        cache_hit: bool,
+        error: BaseException | None,
+    ) -> None:
+        pass
+
+    def on_teardown(
+        self,
+        node: DependencyNode,
+        *,
+        duration: float,
+        error: BaseException | None,
+    ) -> None:
+        pass
+
+
+class TracingObserver(DependencyObserver):
+    __slots__ = ("_tracer",)
+
+    def __init__(self, tracer: Any) -> None:
+        self._tracer = tracer
+
+    def on_dependency_start(self, node: DependencyNode) -> Any:
+        return self._tracer.start_span(
+            get_callable_name(node.call),
+            attributes={
+                "di.kind": node.kind.value,
+                "di.run": node.run,
+                "di.scope": node.scope,
+            },
+        )
+
+    def on_dependency_end(
+        self,
+        node: DependencyNode,
+        state: Any,
+        *,
+        duration: float,
+        cache_hit: bool,
+        error: BaseException | None,
+    ) -> None:
+        state.set_attribute("di.cache_hit", cache_hit)
+        if error is not None:
+            state.record_exception(error)
+        state.end()
+
+    def on_teardown(
+        self,
+        node: DependencyNode,
+        *,
+        duration: float,
+        error: BaseException | None,
+    ) -> None:
+        end_time = time.time_ns()
+        span = self._tracer.start_span(
+            f"{get_callable_name(node.call)} teardown",
+            attributes={"di.kind": node.kind.value, "di.run": node.run},
+            start_time=end_time - int(duration * 1e9),
+        )
+        if error is not None:
+            span.record_exception(error)
+        span.end(end_time=end_time)
+
+
+class MetricsObserver(DependencyObserver):
+    __slots__ = ("_duration", "_teardown_duration")
+
+    def __init__(self, duration: Any, teardown_duration: Any | None = None) -> None:
+        self._duration = duration
+        self._teardown_duration = teardown_duration
+
+    def on_dependency_end(
+        self,
+        node: DependencyNode,
+        state: Any,
+        *,
+        duration: float,
+        cache_hit: bool,
+        error: BaseException | None,
+    ) -> None:
+        self._duration.labels(
+            dependency=get_callable_name(node.call),
+            kind=node.kind.value,
+            run=node.run,
+            cache_hit=str(cache_hit).lower(),
+        ).observe(duration)
+
+    def on_teardown(
+        self,
+        node: DependencyNode,
+        *,
+        duration: float,
+        error: BaseException | None,
+    ) -> None:
+        if self._teardown_duration is not None:
+            self._teardown_duration.labels(
+                dependency=get_callable_name(node.call),
+                kind=node.kind.value,
+                run=node.run,
+            ).observe(duration)
+
+
+class ObservedContextManager(AbstractContextManager[Any]):
+    __slots__ = ("_cm", "_node", "_observers")
+
+    def __init__(
+        self,
+        cm: AbstractContextManager[Any],
+        node: DependencyNode,
+        observers: tuple[DependencyObserver, ...],
+    ) -> None:
+        self._cm = cm
+        self._node = node
+        self._observers = observers
+
+    def __enter__(self) -> Any:
+        return self._cm.__enter__()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> bool | None:
+        started_at = time.perf_counter()
+        error: BaseException | None = None
+        try:
+            return self._cm.__exit__(exc_type, exc_value, traceback)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            notify_teardown(
+                self._observers,
+                self._node,
+                duration=time.perf_counter() - started_at,
+                error=error,
+            )
+
+
+class ObservedAsyncContextManager(AbstractAsyncContextManager[Any]):
+    __slots__ = ("_cm", "_node", "_observers")
+
+    def __init__(
+        self,
+        cm: AbstractAsyncContextManager[Any],
+        node: DependencyNode,
+        observers: tuple[DependencyObserver, ...],
+    ) -> None:
+        self._cm = cm
+        self._node = node
+        self._observers = observers
+
+    async def __aenter__(self) -> Any:
+        return await self._cm.__aenter__()
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> bool | None:
+        started_at = time.perf_counter()
+        error: BaseException | None = None
+        try:
+            return await self._cm.__aexit__(exc_type, exc_value, traceback)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            notify_teardown(
+                self._observers,
+                self._node,
+                duration=time.perf_counter() - started_at,
+                error=error,
+            )
@@ -0,0 +1,47 @@
+from collections.abc import Callable
+from typing import Any
+
+
+class DependencyOverrides(dict[Callable[..., Any], Callable[..., Any]]):
+    __slots__ = ("version",)
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.version = 0
+
+    def __setitem__(self, key: Callable[..., Any], value: Callable[..., Any]) -> None:
+        super().__setitem__(key, value)
+        self.version += 1
+
+    def __delitem__(self, key: Callable[..., Any]) -> None:
+        super().__delitem__(key)
+        self.version += 1
+
+    def __ior__(self, other: Any) -> "DependencyOverrides":
+        self.update(other)
+        return self
+
+    def clear(self) -> None:
+        super().clear()
+        self.version += 1
+
+    def pop(self, key: Callable[..., Any], *default: Any) -> Any:
+        value = super().pop(key, *default)
+        self.version += 1
+        return value
+
+    def popitem(self) -> tuple[Callable[..., Any], Callable[..., Any]]:
+        item = super().popitem()
+        self.version += 1
+        return item
+
+    def setdefault(
+        self, key: Callable[..., Any], default: Callable[..., Any]  # type: ignore[override]
+    ) -> Callable[..., Any]:
+        value = super().setdefault(key, default)
+        self.version += 1
+        return value
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        super().update(*args, **kwargs)
+        self.version += 1
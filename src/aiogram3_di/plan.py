@@ -0,0 +1,304 @@
+import inspect
+import pickle
+from collections.abc import Callable, Hashable, Mapping
+from dataclasses import dataclass, field
+from typing import Any
+
+from aiogram.dispatcher.event.handler import HandlerObject
+
+from .depends import MISSING, Depends, Run, Scope, Teardown
+from .exceptions import DependencyCycleError
+from .providers import ProviderRegistry
+from .scopes import CallKey
+from .utils import CallableInfo, CallKind, get_callable_info, get_dependency
+
+
+# Middleware data that is bound to the event loop or the dispatcher, so it
+# cannot be passed to a dependency run in another process.
+PROCESS_UNSAFE_PARAMS = frozenset(
+    {
+        "bot",
+        "bots",
+        "dispatcher",
+        "event_router",
+        "event_context",
+        "handler",
+        "state",
+        "raw_state",
+        "fsm_storage",
+        "di_manager",
+    }
+)
+
+
+@dataclass(frozen=True, slots=True)
+class DependencyNode:
+    call: Callable[..., Any]
+    kind: CallKind
+    run: Run
+    data_params: tuple[str, ...]
+    dependency_params: tuple[tuple[str, int], ...]
+    event_param: bool = False
+    use_cache: bool = True
+    scope: Scope = "update"
+    # Nodes that a non-update scoped dependency is created from. They are
+    # resolved only when the scoped value is created, and dependency_params
+    # index into them instead of the enclosing plan.
+    scoped_nodes: tuple["DependencyNode", ...] = ()
+    cache_ttl: float | None = None
+    cache_key_func: Callable[..., Hashable] | None = None
+    cache_key_params: tuple[str, ...] = ()
+    teardown: Teardown = "inline"
+    timeout: float | None = None
+    fallback: Any = MISSING
+    call_key: CallKey = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "call_key", CallKey(self.call))
+
+
+@dataclass(frozen=True, slots=True)
+class DependencyPlan:
+    nodes: tuple[DependencyNode, ...]
+    handler_params: tuple[tuple[str, int], ...]
+    handler_dependencies_end: int
+    # Whether resolving the plan registers anything on the update's exit
+    # stack: generator teardown or leases on stores that can evict entries.
+    has_teardown: bool = True
+
+
+def compile_plan(
+    handler: HandlerObject,
+    handler_dependencies: tuple[Depends, ...],
+    dependency_overrides: Mapping[Callable[..., Any], Callable[..., Any]],
+    *,
+    default_run: Run = "thread",
+    default_timeout: float | None = None,
+    providers: ProviderRegistry | None = None,
+) -> DependencyPlan:
+    builder = _PlanBuilder(
+        dependency_overrides,
+        default_run=default_run,
+        default_timeout=default_timeout,
+        providers=providers,
+    )
+
+    for handler_dependency in handler_dependencies:
+        builder.add_dependency(handler_dependency, None)
+    handler_dependencies_end = len(builder.nodes)
+
+    handler_params: list[tuple[str, int]] = []
+    for param_name, annotation in inspect.get_annotations(handler.callback).items():
+        if param_name == "return":
+            continue
+        if (dependency_info := get_dependency(annotation)) is not None:
+            dependency, type_annotation = dependency_info
+            index = builder.add_dependency(dependency, type_annotation)
+            handler_params.append((param_name, index))
+
+    return DependencyPlan(
+        nodes=tuple(builder.nodes),
+        handler_params=tuple(handler_params),
+        handler_dependencies_end=handler_dependencies_end,
+        has_teardown=any(
+            node.kind in (CallKind.ASYNC_GEN, CallKind.GEN)
+            or node.scope in ("chat", "user")
+            or node.cache_ttl is not None
+            for node in builder.nodes
+        ),
+    )
+
+
+class _PlanBuilder:
+    __slots__ = (
+        "_dependency_overrides",
+        "_default_run",
+        "_default_timeout",
+        "_providers",
+        "_scoped",
+        "_path",
+        "_cached",
+        "nodes",
+    )
+
+    def __init__(
+        self,
+        dependency_overrides: Mapping[Callable[..., Any], Callable[..., Any]],
+        *,
+        default_run: Run,
+        default_timeout: float | None,
+        providers: ProviderRegistry | None = None,
+        scoped: bool = False,
+        path: list[Callable[..., Any]] | None = None,
+    ) -> None:
+        self._dependency_overrides = dependency_overrides
+        self._default_run = default_run
+        self._default_timeout = default_timeout
+        self._providers = providers
+        # Nodes of a scoped dependency live as long as its value, so they
+        # are always torn down with it.
+        self._scoped = scoped
+        # Calls whose parameters are being added, shared with the builders of
+        # scoped dependencies to detect cycles across them.
+        self._path = [] if path is None else path
+        # Keyed by id(call) and the options that change how the value is
+        # created: nodes keep their callables alive while the plan is built,
+        # and identity does not depend on the callable's __hash__.
+        self._cached: dict[tuple[Any, ...], int] = {}
+        self.nodes: list[DependencyNode] = []
+
+    def add_dependency(self, dependency: Depends, type_annotation: Any) -> int:
+        if dependency.func is None and self._providers is not None:
+            dependency = self._providers.get(type_annotation) or dependency
+        original_call = dependency.func or type_annotation
+        call = self._get_override(original_call)
+        info = get_callable_info(call)
+
+        kind = info.kind
+        if kind in (CallKind.ASYNC_GEN, CallKind.COROUTINE):
+            run: Run = "inline"
+        else:
+            run = dependency.run or self._default_run
+
+        cache_key = (
+            id(call),
+            run,
+            dependency.scope,
+            dependency.cache_ttl,
+            id(dependency.cache_key),
+            dependency.teardown,
+            dependency.timeout,
+            id(dependency.fallback),
+        )
+        if dependency.use_cache and cache_key in self._cached:
+            return self._cached[cache_key]
+
+        if any(path_call is call for path_call in self._path):
+            raise DependencyCycleError([*self._path, call])
+        self._path.append(call)
+        try:
+            return self._add_node(dependency, call, info, run, cache_key)
+        finally:
+            self._path.pop()
+
+    def _add_node(
+        self,
+        dependency: Depends,
+        call: Callable[..., Any],
+        info: CallableInfo,
+        run: Run,
+        cache_key: tuple[Any, ...],
+    ) -> int:
+        kind = info.kind
+        if run == "process":
+            _check_process_call(call, kind)
+        scoped = dependency.scope != "update"
+        if scoped:
+            params_builder = _PlanBuilder(
+                self._dependency_overrides,
+                default_run=self._default_run,
+                default_timeout=self._default_timeout,
+                providers=self._providers,
+                scoped=True,
+                path=self._path,
+            )
+        else:
+            params_builder = self
+
+        data_params: list[str] = []
+        dependency_params: list[tuple[str, int]] = []
+        event_param = False
+
+        for parameter in info.parameters:
+            if parameter.dependency is not None:
+                index = params_builder.add_dependency(
+                    parameter.dependency, parameter.type_annotation
+                )
+                if parameter.required:
+                    dependency_params.append((parameter.name, index))
+            elif parameter.required and parameter.name == "event":
+                event_param = True
+            elif parameter.required:
+                if run == "process" and parameter.name in PROCESS_UNSAFE_PARAMS:
+                    raise ValueError(
+                        f"`{parameter.name}` cannot be passed to {call!r} "
+                        "run in another process"
+                    )
+                data_params.append(parameter.name)
+
+        teardown: Teardown = "inline" if self._scoped else dependency.teardown
+        if teardown == "background":
+            for _, index in dependency_params:
+                dependency_node = self.nodes[index]
+                if (
+                    dependency_node.kind in (CallKind.ASYNC_GEN, CallKind.GEN)
+                    and dependency_node.teardown == "inline"
+                ):
+                    raise ValueError(
+                        f"{call!r} is torn down in the background, so it cannot "
+                        f"depend on {dependency_node.call!r} torn down inline"
+                    )
+
+        # Synchronous calls on the event loop cannot be interrupted.
+        if run == "inline" and kind in (CallKind.SYNC, CallKind.GEN):
+            timeout = None
+        elif dependency.timeout is not None:
+            timeout = dependency.timeout
+        else:
+            timeout = self._default_timeout
+
+        cache_key_params: tuple[str, ...] = ()
+        if dependency.cache_ttl is not None and dependency.cache_key is None:
+            # The event differs on every update, so the default key never hits.
+            if event_param:
+                raise ValueError(f"cache_ttl of {call!r} needs a cache_key")
+        elif dependency.cache_key is not None:
+            cache_key_params = tuple(inspect.signature(dependency.cache_key).parameters)
+            params = {*data_params, *(name for name, _ in dependency_params)}
+            if event_param:
+                params.add("event")
+            for param_name in cache_key_params:
+                if param_name not in params:
+                    raise ValueError(
+                        f"`{param_name}` of cache_key is not a parameter of {call!r}"
+                    )
+
+        self.nodes.append(
+            DependencyNode(
+                call=call,
+                kind=kind,
+                run=run,
+                data_params=tuple(data_params),
+                dependency_params=tuple(dependency_params),
+                event_param=event_param,
+                use_cache=dependency.use_cache,
+                scope=dependency.scope,
+                scoped_nodes=tuple(params_builder.nodes) if scoped else (),
+                cache_ttl=dependency.cache_ttl,
+                cache_key_func=dependency.cache_key,
+                cache_key_params=cache_key_params,
+                teardown=teardown,
+                timeout=timeout,
+                fallback=dependency.fallback,
+            )
+        )
+        index = len(self.nodes) - 1
+        self._cached.setdefault(cache_key, index)
+        return index
+
+    def _get_override(self, call: Callable[..., Any]) -> Callable[..., Any]:
+        try:
+            return self._dependency_overrides.get(call, call)
+        except TypeError:  # unhashable callables cannot be overridden
+            return call
+
+
+def _check_process_call(call: Callable[..., Any], kind: CallKind) -> None:
+    if kind is not CallKind.SYNC:
+        raise ValueError(f"{call!r} must be a plain function to run in a process")
+    try:
+        pickle.dumps(call)
+    except Exception as e:
+        raise ValueError(
+            f"{call!r} cannot be run in a process, because it cannot be pickled"
+        ) from e
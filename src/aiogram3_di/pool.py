@@ -0,0 +1,281 @@
+import asyncio
+import inspect
+import logging
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass
+from typing import Annotated, Any
+
+from .depends import Depends
+
+logger = logging.getLogger(__name__)
+
+HealthCheck = Callable[[Any], bool | Awaitable[bool]]
+
+
+@dataclass(frozen=True, slots=True)
+class PoolStats:
+    size: int
+    idle: int
+    in_use: int
+    waiting: int
+    created: int
+    discarded: int
+
+
+class _Resource:
+    __slots__ = ("value", "stack", "generation", "released_at")
+
+    def __init__(self, value: Any, stack: AsyncExitStack, generation: int) -> None:
+        self.value = value
+        self.stack = stack
+        self.generation = generation
+        self.released_at = 0.0
+
+
+class ResourcePool:
+    __slots__ = (
+        "_provider",
+        "_min_size",
+        "_max_size",
+        "_idle_timeout",
+        "_check",
+        "_idle",
+        "_size",
+        "_waiters",
+        "_generation",
+        "_created",
+        "_discarded",
+        "_tasks",
+        "__signature__",
+        "__weakref__",
+    )
+
+    def __init__(
+        self,
+        provider: Callable[..., AsyncIterator[Any]],
+        *,
+        min_size: int = 0,
+        max_size: int = 10,
+        idle_timeout: float | None = None,
+        check: HealthCheck | None = None,
+    ) -> None:
+        if not inspect.isasyncgenfunction(provider):
+            raise ValueError(f"{provider!r} must be an async generator function")
+        if max_size < 1:
+            raise ValueError("max_size must be greater than 0")
+        if not 0 <= min_size <= max_size:
+            raise ValueError("min_size must be between 0 and max_size")
+        if idle_timeout is not None and idle_timeout <= 0:
+            raise ValueError("idle_timeout must be greater than 0")
+
+        self._provider = provider
+        self._min_size = min_size
+        self._max_size = max_size
+        self._idle_timeout = idle_timeout
+        self._check = check
+        # Most recently released last, so checkouts reuse warm resources and
+        # the ones idle the longest expire first.
+        self._idle: deque[_Resource] = deque()
+        self._size = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+        self._generation = 0
+        self._created = 0
+        self._discarded = 0
+        self._tasks: set[asyncio.Task[None]] = set()
+
+        # The pool lives in the app scope, so it is closed with the other
+        # app scoped dependencies on dispatcher shutdown.
+        async def lifetime() -> AsyncIterator[ResourcePool]:
+            try:
+                yield self
+            finally:
+                await self.close()
+
+        signature = inspect.signature(provider)
+        parameters = [
+            parameter
+            for parameter in signature.parameters.values()
+            if parameter.kind is not inspect.Parameter.VAR_KEYWORD
+        ]
+        parameters.append(
+            inspect.Parameter(
+                "_pool",
+                inspect.Parameter.KEYWORD_ONLY,
+                annotation=Annotated[ResourcePool, Depends(lifetime, scope="app")],
+            )
+        )
+        # The dependency takes the provider's parameters, which are used to
+        # create new resources.
+        self.__signature__ = signature.replace(
+            parameters=parameters, return_annotation=inspect.Signature.empty
+        )
+
+    @property
+    def stats(self) -> PoolStats:
+        return PoolStats(
+            size=self._size,
+            idle=len(self._idle),
+            in_use=self._size - len(self._idle),
+            waiting=len(self._waiters),
+            created=self._created,
+            discarded=self._discarded,
+        )
+
+    async def __call__(self, **kwargs: Any) -> AsyncIterator[Any]:
+        kwargs.pop("_pool", None)
+        resource = await self._acquire(kwargs)
+        try:
+            yield resource.value
+        except BaseException as e:
+            # The provider sees the error, as it would without the pool, and
+            # a resource that may be broken is not reused.
+            await self._discard(resource, e)
+            raise
+        await self._release(resource)
+
+    async def close(self) -> None:
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        # Resources in use are closed when they are released.
+        self._generation += 1
+        while self._idle:
+            await self._discard(self._idle.pop())
+
+    async def _acquire(self, kwargs: dict[str, Any]) -> _Resource:
+        while True:
+            while self._idle:
+                resource = self._idle.pop()
+                if self._is_expired(resource):
+                    await self._discard(resource)
+                elif await self._is_healthy(resource):
+                    self._fill(kwargs)
+                    return resource
+                else:
+                    await self._discard(resource)
+
+            if self._size < self._max_size:
+                resource = await self._create(kwargs)
+                self._fill(kwargs)
+                return resource
+
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                elif not waiter.cancelled():
+                    # Woken and cancelled at once: pass the wakeup on.
+                    self._wake()
+                raise
+
+    async def _is_healthy(self, resource: _Resource) -> bool:
+        if self._check is None:
+            return True
+        try:
+            healthy = self._check(resource.value)
+            if inspect.isawaitable(healthy):
+                healthy = await healthy
+        except Exception:
+            logger.exception("Health check of a pooled resource failed")
+            return False
+        return bool(healthy)
+
+    async def _create(self, kwargs: dict[str, Any]) -> _Resource:
+        # The slot is taken before awaiting, so concurrent checkouts cannot
+        # create more than max_size resources.
+        self._size += 1
+        stack = AsyncExitStack()
+        try:
+            value = await stack.enter_async_context(
+                asynccontextmanager(self._provider)(**kwargs)
+            )
+        except BaseException:
+            self._size -= 1
+            self._wake()
+            raise
+        self._created += 1
+        return _Resource(value, stack, self._generation)
+
+    async def _release(self, resource: _Resource) -> None:
+        if resource.generation != self._generation:
+            await self._discard(resource)
+            return
+        resource.released_at = time.monotonic()
+        self._idle.append(resource)
+        self._wake()
+
+        while self._idle and self._is_expired(self._idle[0]):
+            await self._discard(self._idle.popleft())
+
+    def _is_expired(self, resource: _Resource) -> bool:
+        # Resources up to min_size are kept however long they are idle.
+        return (
+            self._idle_timeout is not None
+            and self._size > self._min_size
+            and time.monotonic() - resource.released_at > self._idle_timeout
+        )
+
+    async def _discard(
+        self, resource: _Resource, error: BaseException | None = None
+    ) -> None:
+        self._size -= 1
+        self._discarded += 1
+        self._wake()
+        try:
+            if error is None:
+                await resource.stack.aclose()
+            else:
+                await resource.stack.__aexit__(type(error), error, error.__traceback__)
+        except Exception as e:
+            if e is not error:
+                logger.exception("Failed to close a pooled resource")
+
+    def _fill(self, kwargs: dict[str, Any]) -> None:
+        # Resources up to min_size are created in the background, so the
+        # update that triggered it does not wait for them.
+        missing = self._min_size - self._size - len(self._tasks)
+        for _ in range(missing):
+            task = asyncio.get_running_loop().create_task(self._fill_one(kwargs))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _fill_one(self, kwargs: dict[str, Any]) -> None:
+        try:
+            resource = await self._create(kwargs)
+        except Exception:
+            logger.exception("Failed to create a pooled resource")
+            return
+        await self._release(resource)
+
+    def _wake(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+
+def Pooled(
+    provider: Callable[..., AsyncIterator[Any]],
+    *,
+    min_size: int = 0,
+    max_size: int = 10,
+    idle_timeout: float | None = None,
+    check: HealthCheck | None = None,
+    **options: Any,
+) -> Depends:
+    return Depends(
+        ResourcePool(
+            provider,
+            min_size=min_size,
+            max_size=max_size,
+            idle_timeout=idle_timeout,
+            check=check,
+        ),
+        **options,
+    )
@@ -0,0 +1,69 @@
+from typing import Any
+
+from .depends import Depends
+from .utils import get_callable_name
+
+
+class ProviderRegistry:
+    __slots__ = ("_providers", "_resolved", "version")
+
+    def __init__(self) -> None:
+        self._providers: dict[Any, Depends] = {}
+        # Requested type -> provider, including types matched through
+        # subclasses and protocols, so each type is searched only once.
+        self._resolved: dict[Any, Depends | None] = {}
+        self.version = 0
+
+    def register(self, type_: Any, dependency: Depends) -> None:
+        self._providers[type_] = dependency
+        self._resolved.clear()
+        self.version += 1
+
+    def get(self, type_: Any) -> Depends | None:
+        try:
+            return self._resolved[type_]
+        except KeyError:
+            pass
+        except TypeError:  # unhashable annotations cannot be registered
+            return None
+
+        dependency = self._providers.get(type_)
+        if dependency is None and isinstance(type_, type):
+            matches = [
+                (provided, registered)
+                for provided, registered in self._providers.items()
+                if isinstance(provided, type) and _implements(provided, type_)
+            ]
+            if len(matches) > 1:
+                names = ", ".join(
+                    get_callable_name(provided) for provided, _ in matches
+                )
+                raise ValueError(
+                    f"{get_callable_name(type_)} is provided by several "
+                    f"registered types: {names}"
+                )
+            if matches:
+                dependency = matches[0][1]
+        self._resolved[type_] = dependency
+        return dependency
+
+
+def _implements(provided: type, requested: type) -> bool:
+    if getattr(requested, "_is_protocol", False):
+        # Structural check, so protocols do not have to be runtime checkable.
+        provided_members = _get_members(provided)
+        return all(
+            name in provided_members for name in _get_members(requested, protocol=True)
+        )
+    return issubclass(provided, requested)
+
+
+def _get_members(cls: type, *, protocol: bool = False) -> set[str]:
+    # Public attributes, methods and annotated instance attributes.
+    members: set[str] = set()
+    for base in cls.__mro__:
+        if base is object or (protocol and base.__name__ in ("Protocol", "Generic")):
+            continue
+        members.update(base.__dict__.get("__annotations__", {}))
+        members.update(base.__dict__)
+    return {name for name in members if not name.startswith("_")}
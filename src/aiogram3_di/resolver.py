@@ -1,26 +1,30 @@
 import asyncio
-import inspect
-from collections.abc import Callable
+import time
+from collections.abc import Awaitable, Callable, Hashable, Sequence
+from functools import partial
 from contextlib import AsyncExitStack, asynccontextmanager, contextmanager
-from typing import Any, TypeAlias, _AnnotatedAlias
+from typing import TYPE_CHECKING, Any
 
 from aiogram.dispatcher.event.handler import HandlerObject
 from aiogram.types import TelegramObject
 
-from .depends import Depends
-from .manager import DIManager
-from .utils import (
-    get_dependencies,
-    get_valid_kwargs,
-    is_async_gen_callable,
-    is_gen_callable,
-    contextmanager_in_threadpool,
-    is_coroutine_callable,
+from .depends import MISSING, Depends, Scope
+from .exceptions import DependencyTimeoutError
+from .executor import DependencyExecutor
+from .observers import (
+    DependencyObserver,
+    ObservedAsyncContextManager,
+    ObservedContextManager,
+    notify_end,
+    notify_start,
 )
+from .plan import CallKind, DependencyNode, DependencyPlan
+from .scopes import CallKey, ScopeStore, get_scope_key
+from .teardown import BackgroundTeardown
+from .utils import contextmanager_in_threadpool
 
-ParamData: TypeAlias = dict[tuple[int, str], Any]
-
-CACHE_MISSING = object()
+if TYPE_CHECKING:
+    from .manager import DIManager
 
 
 class DependenciesResolver:
@@ -29,8 +33,14 @@ class DependenciesResolver:
         "_handler_dependencies",
         "_event",
         "_middleware_data",
-        "_param_data",
+        "_shared",
+        "_executor",
+        "_scopes",
         "_cache",
+        "_observers",
+        "_teardown",
+        "_background_stack",
+        "_values",
     )
 
     def __init__(
@@ -38,93 +48,290 @@ class DependenciesResolver:
         stack: AsyncExitStack,
         *,
         handler_dependencies: tuple[Depends, ...],
-        event: TelegramObject,
+        event: TelegramObject | None,
         middleware_data: dict[str, Any],
+        shared: dict[CallKey, Any] | None = None,
     ) -> None:
         self._stack = stack
         self._handler_dependencies = handler_dependencies
         self._event = event
         self._middleware_data = middleware_data
-        self._param_data: ParamData = {}
-        self._cache: dict[int, Any] = {}
+        # Values shared by every resolver of the same update: filters,
+        # middlewares and the handler.
+        self._shared = shared
+        self._executor: DependencyExecutor | None = None
+        self._scopes: dict[Scope, ScopeStore] = {}
+        self._cache: ScopeStore | None = None
+        self._observers: tuple[DependencyObserver, ...] = ()
+        self._teardown: BackgroundTeardown | None = None
+        self._background_stack: AsyncExitStack | None = None
+        self._values: list[Any] = []
 
     async def resolve(self) -> dict[str, Any]:
-        for handler_dependency in self._handler_dependencies:
-            await self._resolve_handler_dependency(handler_dependency)
-
+        di_manager: DIManager = self._middleware_data["di_manager"]
         handler: HandlerObject = self._middleware_data["handler"]
-        handler_annotations = inspect.get_annotations(handler.callback)
+        plan = di_manager.get_plan(handler, self._handler_dependencies)
+        return await self.resolve_plan(plan)
 
-        for param_name, dependency, type_annotation in get_dependencies(
-            handler_annotations
-        ):
-            await self._process_dependency(param_name, dependency, type_annotation)
+    async def resolve_plan(self, plan: DependencyPlan) -> dict[str, Any]:
+        values = await self.resolve_values(plan)
+        if not values:
+            return self._middleware_data
+        return self._middleware_data | values
 
-        return self._middleware_data | self._extract_params(handler_annotations)
+    async def resolve_values(self, plan: DependencyPlan) -> dict[str, Any]:
+        # Only the handler's injected parameters, without middleware data.
+        di_manager: DIManager = self._middleware_data["di_manager"]
+        self._bind(di_manager)
 
-    def _extract_params(self, annotations: dict[str, Any]) -> dict[str, Any]:
-        dependencies: list[tuple[int, str]] = []
+        self._values = [None] * len(plan.nodes)
 
-        for param_name, param_value in annotations.items():
-            if isinstance(param_value, _AnnotatedAlias) and isinstance(
-                param_value.__metadata__[0], Depends
-            ):
-                dependency: Depends = param_value.__metadata__[0]
-                type_annotation: Any = param_value.__origin__
-                call = self._get_call(dependency, type_annotation)
-                dependencies.append((hash(call), param_name))
+        if di_manager.concurrency == "graph":
+            end = plan.handler_dependencies_end
+            await self._resolve_graph(plan.nodes, 0, end)
+            await self._resolve_graph(plan.nodes, end, len(plan.nodes))
+        else:
+            for index, node in enumerate(plan.nodes):
+                self._values[index] = await self._process_plan_node(node, self._stack)
 
         return {
-            param_name: self._param_data[(func_hash, param_name)]
-            for func_hash, param_name in dependencies
+            param_name: self._values[index] for param_name, index in plan.handler_params
         }
 
-    async def _resolve_handler_dependency(self, dependency: Depends) -> None:
-        for param_name, sub_dependency, type_annotation in get_dependencies(
-            inspect.get_annotations(dependency.func)
-        ):
-            await self._process_dependency(param_name, sub_dependency, type_annotation)
+    async def warmup(self, plan: DependencyPlan) -> None:
+        self._bind(self._middleware_data["di_manager"])
+        for node in plan.nodes:
+            if node.scope == "app" and self._can_create(node):
+                await self._process_node(node, self._stack, [])
 
-        call = self._get_call(dependency, None)
-        await self.__process_dependency(call, dependency)
+    def _bind(self, di_manager: "DIManager") -> None:
+        self._executor = di_manager.executor
+        self._scopes = di_manager.scopes
+        self._cache = di_manager.cache
+        self._observers = di_manager.observers
+        self._teardown = di_manager.teardown
 
-    async def _process_dependency(
-        self, param_name: str, dependency: Depends, type_annotation: Any
+    def _can_create(self, node: DependencyNode) -> bool:
+        if node.event_param or node.scope in ("chat", "user"):
+            return False
+        if any(
+            param_name not in self._middleware_data for param_name in node.data_params
+        ):
+            return False
+        return all(self._can_create(scoped_node) for scoped_node in node.scoped_nodes)
+
+    async def _resolve_graph(
+        self,
+        nodes: Sequence[DependencyNode],
+        start: int,
+        end: int,
     ) -> None:
-        call = self._get_call(dependency, type_annotation)
-        result = await self.__process_dependency(call, dependency)
-        self._param_data[(hash(call)), param_name] = result
-
-    def _get_call(
-        self, dependency: Depends, type_annotation: Any
-    ) -> Callable[..., Any]:
-        original_call = dependency.func or type_annotation
-        di_manager: DIManager = self._middleware_data["di_manager"]
-        call = di_manager.dependency_overrides.get(original_call, original_call)
-        return call
+        tasks: list[asyncio.Task[None]] = []
+        stacks: dict[int, AsyncExitStack] = {}
+
+        async def process_node(index: int, node: DependencyNode) -> None:
+            for _, dependency_index in node.dependency_params:
+                if dependency_index >= start:
+                    await tasks[dependency_index - start]
+
+            if node.kind in (CallKind.ASYNC_GEN, CallKind.GEN):
+                stack = stacks[index] = AsyncExitStack()
+            else:
+                stack = self._stack
+            self._values[index] = await self._process_plan_node(node, stack)
+
+        for index in range(start, end):
+            tasks.append(asyncio.create_task(process_node(index, nodes[index])))
+
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            # Exits are registered in plan order, not in completion order,
+            # so teardown is as deterministic as in sequential mode.
+            for index in sorted(stacks):
+                self._stack.push_async_exit(stacks[index])
+
+    async def _process_plan_node(
+        self, node: DependencyNode, stack: AsyncExitStack
+    ) -> Any:
+        # Scoped and cache_ttl values are shared through their stores.
+        if (
+            self._shared is None
+            or not node.use_cache
+            or node.scope != "update"
+            or node.cache_ttl is not None
+        ):
+            return await self._process_node(node, stack, self._values)
+
+        value = self._shared.get(node.call_key, MISSING)
+        if value is MISSING:
+            value = await self._process_node(node, stack, self._values)
+            self._shared[node.call_key] = value
+        return value
+
+    async def _process_node(
+        self,
+        node: DependencyNode,
+        stack: AsyncExitStack,
+        values: list[Any],
+    ) -> Any:
+        if node.timeout is None:
+            return await self._resolve_node(node, stack, values)
+        try:
+            return await asyncio.wait_for(
+                self._resolve_node(node, stack, values), node.timeout
+            )
+        except asyncio.TimeoutError:
+            if node.fallback is not MISSING:
+                return node.fallback
+            raise DependencyTimeoutError(node.call, node.timeout) from None
+
+    async def _resolve_node(
+        self,
+        node: DependencyNode,
+        stack: AsyncExitStack,
+        values: list[Any],
+    ) -> Any:
+        if self._observers:
+            return await self._observe_node(node, stack, values)
+        if node.cache_ttl is None and node.scope == "update":
+            return await self._invoke(node, self._get_kwargs(node, values), stack)
+
+        store, key, factory = self._get_stored(node, values)
+        if key is None:
+            return await factory(stack)
+        return await store.get_or_create(key, factory, ttl=node.cache_ttl, lease=stack)
 
-    async def __process_dependency(
-        self, call: Callable[..., Any], dependency: Depends
+    async def _observe_node(
+        self,
+        node: DependencyNode,
+        stack: AsyncExitStack,
+        values: list[Any],
     ) -> Any:
-        cached_value = self._cache.get(hash(call), CACHE_MISSING)
+        states = notify_start(self._observers, node)
+        started_at = time.perf_counter()
+        cache_hit = False
+        error: BaseException | None = None
 
-        if cached_value is not CACHE_MISSING and dependency.use_cache:
-            return cached_value
+        try:
+            if node.cache_ttl is None and node.scope == "update":
+                return await self._invoke(node, self._get_kwargs(node, values), stack)
 
-        params = self._extract_params(inspect.get_annotations(call))
-        values = get_valid_kwargs(
-            (self._middleware_data | {"event": self._event} | params), call
+            store, key, factory = self._get_stored(node, values)
+            if key is None:
+                return await factory(stack)
+
+            async def observed_factory(entry_stack: AsyncExitStack) -> Any:
+                nonlocal cache_hit
+                cache_hit = False
+                return await factory(entry_stack)
+
+            cache_hit = True
+            return await store.get_or_create(
+                key, observed_factory, ttl=node.cache_ttl, lease=stack
+            )
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            notify_end(
+                self._observers,
+                node,
+                states,
+                duration=time.perf_counter() - started_at,
+                cache_hit=cache_hit,
+                error=error,
+            )
+
+    def _get_stored(
+        self, node: DependencyNode, values: list[Any]
+    ) -> tuple[ScopeStore, Hashable | None, Callable[[AsyncExitStack], Awaitable[Any]]]:
+        if node.cache_ttl is not None:
+            kwargs = self._get_kwargs(node, values)
+            if node.cache_key_func is not None:
+                key = node.cache_key_func(
+                    **{
+                        param_name: kwargs[param_name]
+                        for param_name in node.cache_key_params
+                    }
+                )
+            else:
+                key = tuple(kwargs.items())
+            factory = partial(self._invoke, node, kwargs)
+            try:
+                hash(key)
+            except TypeError:  # values that cannot be keyed are not cached
+                return self._cache, None, factory
+            return self._cache, (node.call_key, key), factory
+
+        return (
+            self._scopes[node.scope],
+            get_scope_key(node.scope, node.call_key, self._middleware_data),
+            partial(self._create_scoped, node),
         )
 
-        if is_async_gen_callable(call):
-            cm = asynccontextmanager(call)(**values)
-            result = await self._stack.enter_async_context(cm)
-        elif is_gen_callable(call):
-            cm = contextmanager_in_threadpool(contextmanager(call)(**values))
-            result = await self._stack.enter_async_context(cm)
-        elif is_coroutine_callable(call):
-            result = await call(**values)
-        else:
-            result = await asyncio.to_thread(call, **values)
-        self._cache.setdefault(hash(call), result)
-        return result
+    async def _create_scoped(self, node: DependencyNode, stack: AsyncExitStack) -> Any:
+        values: list[Any] = [None] * len(node.scoped_nodes)
+        for index, scoped_node in enumerate(node.scoped_nodes):
+            values[index] = await self._process_node(scoped_node, stack, values)
+        return await self._invoke(node, self._get_kwargs(node, values), stack)
+
+    def _get_kwargs(self, node: DependencyNode, values: list[Any]) -> dict[str, Any]:
+        data = self._middleware_data
+        kwargs = {
+            param_name: data[param_name]
+            for param_name in node.data_params
+            if param_name in data
+        }
+        if node.event_param:
+            kwargs["event"] = self._event
+        for param_name, index in node.dependency_params:
+            kwargs[param_name] = values[index]
+        return kwargs
+
+    def _get_background_stack(self) -> AsyncExitStack:
+        if self._background_stack is None:
+            self._background_stack = AsyncExitStack()
+            self._stack.push_async_exit(
+                partial(self._teardown.submit, self._background_stack)
+            )
+        return self._background_stack
+
+    async def _invoke(
+        self, node: DependencyNode, kwargs: dict[str, Any], stack: AsyncExitStack
+    ) -> Any:
+        call = node.call
+        if node.teardown == "background":
+            stack = self._get_background_stack()
+        if node.kind is CallKind.ASYNC_GEN:
+            cm = asynccontextmanager(call)(**kwargs)
+            if self._observers:
+                cm = ObservedAsyncContextManager(cm, node, self._observers)
+            return await stack.enter_async_context(cm)
+        if node.kind is CallKind.GEN:
+            cm = contextmanager(call)(**kwargs)
+            if node.run == "inline":
+                if self._observers:
+                    cm = ObservedContextManager(cm, node, self._observers)
+                return stack.enter_context(cm)
+            cm = contextmanager_in_threadpool(cm, self._executor)
+            if self._observers:
+                cm = ObservedAsyncContextManager(cm, node, self._observers)
+            return await stack.enter_async_context(cm)
+        if node.kind is CallKind.COROUTINE:
+            return await call(**kwargs)
+        if node.run == "inline":
+            return call(**kwargs)
+        if node.run == "process":
+            di_manager: DIManager = self._middleware_data["di_manager"]
+            return await asyncio.get_running_loop().run_in_executor(
+                di_manager.process_executor, partial(call, **kwargs)
+            )
+        if self._executor is not None:
+            return await self._executor.run(call, **kwargs)
+        return await asyncio.to_thread(call, **kwargs)
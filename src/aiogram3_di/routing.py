@@ -0,0 +1,60 @@
+import weakref
+
+from aiogram import Router
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.dispatcher.event.telegram import TelegramEventObserver
+from aiogram.dispatcher.flags import get_flag
+
+from .depends import Depends
+
+
+class _Declarations:
+    __slots__ = ("dependencies", "version")
+
+    def __init__(self) -> None:
+        self.dependencies: weakref.WeakKeyDictionary[
+            Router | TelegramEventObserver, tuple[Depends, ...]
+        ] = weakref.WeakKeyDictionary()
+        # Bumped on every change, so compiled plans are rebuilt.
+        self.version = 0
+
+
+declarations = _Declarations()
+
+
+def add_dependencies(
+    target: Router | TelegramEventObserver, *dependencies: Depends
+) -> None:
+    if not isinstance(target, (Router, TelegramEventObserver)):
+        raise TypeError("target must be a router or an observer of a router")
+    for dependency in dependencies:
+        if not isinstance(dependency, Depends):
+            raise TypeError(f"{dependency!r} is not an instance of Depends")
+
+    declarations.dependencies[target] = (
+        *declarations.dependencies.get(target, ()),
+        *dependencies,
+    )
+    declarations.version += 1
+
+
+def get_handler_dependencies(
+    router: Router, handler: HandlerObject
+) -> tuple[Depends, ...]:
+    # Outer routers first, then the observer, then the handler's own flags.
+    dependencies: list[Depends] = []
+    for parent_router in reversed(list(router.chain_head)):
+        dependencies.extend(declarations.dependencies.get(parent_router, ()))
+    for observer in router.observers.values():
+        if any(observer_handler is handler for observer_handler in observer.handlers):
+            dependencies.extend(declarations.dependencies.get(observer, ()))
+            break
+    dependencies.extend(get_flag(handler, "dependencies", default=()))
+
+    # The same dependency declared on several levels is resolved once, at
+    # the outermost one.
+    unique: list[Depends] = []
+    for dependency in dependencies:
+        if dependency not in unique:
+            unique.append(dependency)
+    return tuple(unique)
@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from contextlib import AsyncExitStack
+from typing import Any
+
+from .depends import Scope
+
+logger = logging.getLogger(__name__)
+
+SCOPE_DATA_KEYS: dict[Scope, str] = {
+    "chat": "event_chat",
+    "user": "event_from_user",
+}
+
+
+class CallKey:
+    # Compares callables by identity, so unhashable callables can be stored
+    # and a callable that is garbage collected never aliases a new one.
+    __slots__ = ("call",)
+
+    def __init__(self, call: Callable[..., Any]) -> None:
+        self.call = call
+
+    def __hash__(self) -> int:
+        return id(self.call)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, CallKey) and other.call is self.call
+
+
+def get_scope_key(
+    scope: Scope, call_key: CallKey, data: dict[str, Any]
+) -> Hashable | None:
+    if scope == "app":
+        return call_key
+    scope_object = data.get(SCOPE_DATA_KEYS[scope])
+    if scope_object is None:
+        return None
+    return call_key, scope_object.id
+
+
+class _Entry:
+    __slots__ = ("future", "stack", "expires_at", "leases", "detached")
+
+    def __init__(self, expires_at: float | None) -> None:
+        self.future: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+        self.stack = AsyncExitStack()
+        self.expires_at = expires_at
+        # Number of in-flight updates using the value. A detached entry is
+        # no longer in the store and is torn down when the last one exits.
+        self.leases = 0
+        self.detached = False
+
+
+class ScopeStore:
+    __slots__ = ("_max_size", "_ttl", "_entries")
+
+    def __init__(
+        self, *, max_size: int | None = None, ttl: float | None = None
+    ) -> None:
+        self._max_size = max_size
+        self._ttl = ttl
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get_or_create(
+        self,
+        key: Hashable,
+        factory: Callable[[AsyncExitStack], Awaitable[Any]],
+        *,
+        ttl: float | None = None,
+        lease: AsyncExitStack | None = None,
+    ) -> Any:
+        expired: _Entry | None = None
+
+        while (entry := self._entries.get(key)) is not None:
+            if entry.expires_at is not None and entry.expires_at <= time.monotonic():
+                expired = self._entries.pop(key)
+                break
+
+            if self._max_size is not None:
+                self._entries.move_to_end(key)
+            try:
+                result = await asyncio.shield(entry.future)
+            except asyncio.CancelledError:
+                # The task creating the value was cancelled, not this one.
+                if not entry.future.cancelled():
+                    raise
+            else:
+                self._acquire(entry, lease)
+                return result
+
+        if ttl is None:
+            ttl = self._ttl
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        entry = self._entries[key] = _Entry(expires_at)
+        if expired is not None:
+            await self._detach(expired)
+        await self._evict()
+
+        try:
+            result = await factory(entry.stack)
+        except BaseException as e:
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+            if isinstance(e, asyncio.CancelledError):
+                entry.future.cancel()
+            else:
+                entry.future.set_exception(e)
+                # Mark the exception as retrieved when there are no waiters.
+                entry.future.exception()
+            await entry.stack.aclose()
+            raise
+
+        entry.future.set_result(result)
+        self._acquire(entry, lease)
+        return result
+
+    async def close(self) -> None:
+        entries = list(self._entries.values())
+        self._entries.clear()
+        for entry in reversed(entries):
+            await self._detach(entry)
+
+    async def _evict(self) -> None:
+        if self._max_size is None:
+            return
+        while len(self._entries) > self._max_size:
+            for key, entry in self._entries.items():
+                if entry.future.done():
+                    break
+            else:
+                return
+            del self._entries[key]
+            await self._detach(entry)
+
+    def _acquire(self, entry: _Entry, lease: AsyncExitStack | None) -> None:
+        # Values that are never evicted are only torn down by close().
+        if lease is None or (entry.expires_at is None and self._max_size is None):
+            return
+        entry.leases += 1
+        lease.push_async_callback(self._release, entry)
+
+    async def _release(self, entry: _Entry) -> None:
+        entry.leases -= 1
+        if entry.detached and entry.leases == 0:
+            await self._close_entry(entry)
+
+    async def _detach(self, entry: _Entry) -> None:
+        entry.detached = True
+        if entry.leases == 0:
+            await self._close_entry(entry)
+
+    @staticmethod
+    async def _close_entry(entry: _Entry) -> None:
+        try:
+            await entry.stack.aclose()
+        except Exception:
+            logger.exception("Failed to tear down a scoped dependency")
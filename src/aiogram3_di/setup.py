@@ -1,32 +1,102 @@
-from collections.abc import Callable
+from collections.abc import Callable, Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
 from typing import Any
 
 from aiogram import Dispatcher
 from aiogram.dispatcher.event.telegram import TelegramEventObserver
 
-from aiogram3_di.manager import DIManager
-from aiogram3_di.middleware import DIMiddleware
+from aiogram3_di.depends import Run
+from aiogram3_di.exceptions import DependencyGraphError
+from aiogram3_di.executor import DependencyExecutor
+from aiogram3_di.manager import Concurrency, DIManager
+from aiogram3_di.middleware import DIContextMiddleware, DIMiddleware
+from aiogram3_di.observers import DependencyObserver
+from aiogram3_di.validation import validate_graph
 
 
 def setup_di(
     dispatcher: Dispatcher,
     *,
     allowed_updates: list[str] | None = None,
-    dependency_overrides: dict[Callable[..., Any], Callable[..., Any]] | None = None,
+    dependency_overrides: Mapping[Callable[..., Any], Callable[..., Any]] | None = None,
+    concurrency: Concurrency = "sequential",
+    run: Run = "thread",
+    timeout: float | None = None,
+    executor: DependencyExecutor | None = None,
+    process_executor: ProcessPoolExecutor | None = None,
+    process_workers: int | None = None,
+    scope_max_size: int | None = 1024,
+    scope_ttl: float | None = None,
+    cache_max_size: int | None = 1024,
+    observers: Sequence[DependencyObserver] = (),
+    teardown_max_pending: int | None = 1000,
+    teardown_timeout: float | None = 30,
+    eager: bool = False,
+    validate: bool = False,
 ) -> DIManager:
     if not isinstance(dispatcher, Dispatcher):
         raise TypeError("dispatcher must be an instance of aiogram.Dispatcher")
 
+    if concurrency not in ("sequential", "graph"):
+        raise ValueError(f"`{concurrency}` is not a valid concurrency mode")
+
+    if run not in ("inline", "thread"):
+        raise ValueError(f"`{run}` is not a valid run policy")
+
+    if timeout is not None and timeout <= 0:
+        raise ValueError("timeout must be greater than 0")
+
     if allowed_updates is not None:
         for allowed_update in allowed_updates:
             if allowed_update not in dispatcher.observers:
                 raise ValueError(f"`{allowed_update}` is not a valid allowed update")
 
-    for allowed_update in allowed_updates or dispatcher.resolve_used_update_types():
-        observer: TelegramEventObserver = getattr(dispatcher, allowed_update)
+    dispatcher.update.outer_middleware(DIContextMiddleware())
+    update_types = allowed_updates or dispatcher.resolve_used_update_types()
+    for update_type in update_types:
+        observer: TelegramEventObserver = getattr(dispatcher, update_type)
         observer.middleware(DIMiddleware())
 
     dispatcher["di_manager"] = di_manager = DIManager(
-        dependency_overrides=(dependency_overrides or {})
+        dependency_overrides=(dependency_overrides or {}),
+        concurrency=concurrency,
+        run=run,
+        timeout=timeout,
+        executor=executor,
+        process_executor=process_executor,
+        process_workers=process_workers,
+        scope_max_size=scope_max_size,
+        scope_ttl=scope_ttl,
+        cache_max_size=cache_max_size,
+        observers=observers,
+        teardown_max_pending=teardown_max_pending,
+        teardown_timeout=teardown_timeout,
     )
+    dispatcher.shutdown.register(di_manager.close)
+
+    # Handlers without dependencies get an empty plan here, so the middleware
+    # passes them straight through. Routers included later are compiled on
+    # their first update, or on startup when eager.
+    di_manager.compile_plans(dispatcher, update_types)
+
+    if validate:
+        # Validated on startup, when every router is included and the data
+        # passed to polling is known.
+        async def validate_on_startup(**data: Any) -> None:
+            issues = validate_graph(
+                dispatcher, di_manager, update_types, known_params=data
+            )
+            if issues:
+                raise DependencyGraphError([str(issue) for issue in issues])
+
+        dispatcher.startup.register(validate_on_startup)
+
+    if eager:
+
+        async def warmup(**data: Any) -> None:
+            di_manager.compile_plans(dispatcher, update_types)
+            await di_manager.warmup(data)
+
+        dispatcher.startup.register(warmup)
+
     return di_manager
@@ -0,0 +1,60 @@
+import asyncio
+import logging
+from contextlib import AsyncExitStack
+from types import TracebackType
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundTeardown:
+    __slots__ = ("_max_pending", "_timeout", "_tasks")
+
+    def __init__(
+        self, *, max_pending: int | None = 1000, timeout: float | None = 30
+    ) -> None:
+        if max_pending is not None and max_pending < 1:
+            raise ValueError("max_pending must be greater than 0")
+        if timeout is not None and timeout <= 0:
+            raise ValueError("timeout must be greater than 0")
+
+        self._max_pending = max_pending
+        self._timeout = timeout
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    @property
+    def pending(self) -> int:
+        return len(self._tasks)
+
+    async def submit(
+        self,
+        stack: AsyncExitStack,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        # A full backlog tears down inline, pushing back on the update.
+        if self._max_pending is not None and len(self._tasks) >= self._max_pending:
+            await self._close(stack, exc_type, exc_value, traceback)
+            return
+
+        task = asyncio.create_task(self._close(stack, exc_type, exc_value, traceback))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def drain(self) -> None:
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _close(
+        self,
+        stack: AsyncExitStack,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        try:
+            await asyncio.wait_for(
+                stack.__aexit__(exc_type, exc_value, traceback), self._timeout
+            )
+        except Exception:
+            logger.exception("Failed to tear down dependencies in the background")
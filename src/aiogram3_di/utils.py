@@ -1,48 +1,162 @@
 import asyncio
 import inspect
+import weakref
 from collections.abc import Iterator, Callable
 from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from enum import Enum
 from typing import Any, _AnnotatedAlias, get_args, ContextManager
 
 from .depends import Depends
+from .exceptions import DependencyCycleError
+from .executor import DependencyExecutor
+
+
+class CallKind(Enum):
+    ASYNC_GEN = "async_gen"
+    GEN = "gen"
+    COROUTINE = "coroutine"
+    SYNC = "sync"
+
+
+@dataclass(frozen=True, slots=True)
+class ParameterInfo:
+    name: str
+    required: bool
+    dependency: Depends | None
+    type_annotation: Any
+
+
+@dataclass(frozen=True, slots=True)
+class CallableInfo:
+    kind: CallKind
+    parameters: tuple[ParameterInfo, ...]
+    required_params: frozenset[str]
+
+
+_callable_infos: "weakref.WeakKeyDictionary[Callable[..., Any], CallableInfo]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_callable_info(call: Callable[..., Any]) -> CallableInfo:
+    try:
+        return _callable_infos[call]
+    except KeyError:
+        pass
+    except TypeError:  # not weak-referenceable or not hashable
+        return _inspect_callable(call)
+
+    info = _callable_infos[call] = _inspect_callable(call)
+    return info
+
+
+def _inspect_callable(call: Callable[..., Any]) -> CallableInfo:
+    parameters: list[ParameterInfo] = []
+
+    for parameter in inspect.signature(call).parameters.values():
+        dependency: Depends | None = None
+        type_annotation = parameter.annotation
+        if (dependency_info := get_dependency(type_annotation)) is not None:
+            dependency, type_annotation = dependency_info
+        parameters.append(
+            ParameterInfo(
+                name=parameter.name,
+                required=parameter.default is inspect.Parameter.empty,
+                dependency=dependency,
+                type_annotation=type_annotation,
+            )
+        )
+
+    if _is_async_gen_callable(call):
+        kind = CallKind.ASYNC_GEN
+    elif _is_gen_callable(call):
+        kind = CallKind.GEN
+    elif _is_coroutine_callable(call):
+        kind = CallKind.COROUTINE
+    else:
+        kind = CallKind.SYNC
+
+    return CallableInfo(
+        kind=kind,
+        parameters=tuple(parameters),
+        required_params=frozenset(
+            parameter.name for parameter in parameters if parameter.required
+        ),
+    )
+
+
+def get_callable_name(call: Callable[..., Any]) -> str:
+    name = getattr(call, "__qualname__", None) or type(call).__qualname__
+    return f"{getattr(call, '__module__', None) or ''}.{name}".lstrip(".")
 
 
 def get_valid_kwargs(data: dict[str, Any], call: Callable[..., Any]) -> dict[str, Any]:
-    valid_params: list[str] = [
-        param.name
-        for param in inspect.signature(call).parameters.values()
-        if param.default == inspect.Parameter.empty
-    ]
+    valid_params = get_callable_info(call).required_params
     return {key: value for key, value in data.items() if key in valid_params}
 
 
+def get_dependency(annotation: Any) -> tuple[Depends, Any] | None:
+    if isinstance(annotation, _AnnotatedAlias):
+        type_annotation, dependency = get_args(annotation)[:2]
+        if isinstance(dependency, Depends):
+            return dependency, type_annotation
+    return None
+
+
 def get_dependencies(annotations: dict[str, Any]) -> Iterator[tuple[str, Depends, Any]]:
     for annotation_key, annotation_value in annotations.items():
         if isinstance(annotation_value, inspect.Parameter):
             annotation_value = annotation_value.annotation
 
-        if isinstance(annotation_value, _AnnotatedAlias):
-            type_annotation, dependency = get_args(annotation_value)[:2]
-            if isinstance(dependency, Depends):
-                call = dependency.func or type_annotation
-                if parameters := inspect.signature(call).parameters:
-                    yield from get_dependencies(dict(parameters))
-                yield annotation_key, dependency, type_annotation
+        if (dependency_info := get_dependency(annotation_value)) is not None:
+            dependency, type_annotation = dependency_info
+            yield from _get_sub_dependencies(dependency.func or type_annotation, ())
+            yield annotation_key, dependency, type_annotation
+
+
+def _get_sub_dependencies(
+    call: Callable[..., Any], path: tuple[Callable[..., Any], ...]
+) -> Iterator[tuple[str, Depends, Any]]:
+    if any(path_call is call for path_call in path):
+        raise DependencyCycleError([*path, call])
+    path = (*path, call)
+    for parameter in get_callable_info(call).parameters:
+        if parameter.dependency is not None:
+            yield from _get_sub_dependencies(
+                parameter.dependency.func or parameter.type_annotation, path
+            )
+            yield parameter.name, parameter.dependency, parameter.type_annotation
 
 
 @asynccontextmanager
-async def contextmanager_in_threadpool(cm: ContextManager):
+async def contextmanager_in_threadpool(
+    cm: ContextManager, executor: DependencyExecutor | None = None
+):
+    run = asyncio.to_thread if executor is None else executor.run
     try:
-        yield await asyncio.to_thread(cm.__enter__)
+        yield await run(cm.__enter__)
     except Exception as e:
-        ok = bool(await asyncio.to_thread(cm.__exit__, type(e), e, None))
+        ok = bool(await run(cm.__exit__, type(e), e, None))
         if not ok:
             raise e
     else:
-        await asyncio.to_thread(cm.__exit__, None, None, None)
+        await run(cm.__exit__, None, None, None)
 
 
 def is_coroutine_callable(call: Callable[..., Any]) -> bool:
+    return get_callable_info(call).kind is CallKind.COROUTINE
+
+
+def is_async_gen_callable(call: Callable[..., Any]) -> bool:
+    return get_callable_info(call).kind is CallKind.ASYNC_GEN
+
+
+def is_gen_callable(call: Callable[..., Any]) -> bool:
+    return get_callable_info(call).kind is CallKind.GEN
+
+
+def _is_coroutine_callable(call: Callable[..., Any]) -> bool:
     if inspect.isroutine(call):
         return inspect.iscoroutinefunction(call)
     if inspect.isclass(call):
@@ -51,14 +165,14 @@ def is_coroutine_callable(call: Callable[..., Any]) -> bool:
     return inspect.iscoroutinefunction(dunder_call)
 
 
-def is_async_gen_callable(call: Callable[..., Any]) -> bool:
+def _is_async_gen_callable(call: Callable[..., Any]) -> bool:
     if inspect.isasyncgenfunction(call):
         return True
     dunder_call = getattr(call, "__call__", None)
     return inspect.isasyncgenfunction(dunder_call)
 
 
-def is_gen_callable(call: Callable[..., Any]) -> bool:
+def _is_gen_callable(call: Callable[..., Any]) -> bool:
     if inspect.isgeneratorfunction(call):
         return True
     dunder_call = getattr(call, "__call__", None)
@@ -0,0 +1,205 @@
+import argparse
+import importlib
+import os
+import sys
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from typing import Literal, TypeAlias
+
+from aiogram import Dispatcher, Router
+from aiogram.dispatcher.event.handler import HandlerObject
+
+from .depends import Scope
+from .exceptions import DependencyCycleError
+from .manager import DIManager
+from .plan import DependencyNode
+from .scopes import SCOPE_DATA_KEYS
+from .utils import get_callable_name
+
+IssueKind: TypeAlias = Literal["cycle", "unresolved", "scope", "invalid"]
+
+# Keys aiogram puts into middleware data for every update.
+DEFAULT_DATA_KEYS = frozenset(
+    {
+        "bot",
+        "bots",
+        "dispatcher",
+        "event_update",
+        "event_router",
+        "event_context",
+        "event_from_user",
+        "event_chat",
+        "event_thread_id",
+        "event_business_connection_id",
+        "handler",
+        "state",
+        "raw_state",
+        "fsm_storage",
+        "di_manager",
+    }
+)
+
+# Keys that differ between updates, so values stored in a scope cannot
+# depend on them, except on the key the scope itself is keyed by.
+UPDATE_DATA_KEYS = frozenset(
+    {
+        "event_update",
+        "event_context",
+        "event_from_user",
+        "event_chat",
+        "event_thread_id",
+        "event_business_connection_id",
+        "handler",
+        "state",
+        "raw_state",
+    }
+)
+
+
+@dataclass(frozen=True, slots=True)
+class GraphIssue:
+    kind: IssueKind
+    handler: str
+    path: tuple[str, ...]
+    message: str
+
+    def __str__(self) -> str:
+        return f"{' -> '.join((self.handler, *self.path))}: {self.message}"
+
+
+def validate_graph(
+    router: Router,
+    di_manager: DIManager,
+    update_types: Iterable[str] | None = None,
+    *,
+    known_params: Iterable[str] = (),
+) -> list[GraphIssue]:
+    if update_types is None:
+        update_types = router.resolve_used_update_types()
+    known = DEFAULT_DATA_KEYS.union(known_params)
+    if isinstance(router, Dispatcher):
+        known = known.union(router.workflow_data)
+
+    issues: list[GraphIssue] = []
+    for update_type in update_types:
+        for sub_router in router.chain_tail:
+            for handler in sub_router.observers[update_type].handlers:
+                issues.extend(_validate_handler(handler, sub_router, di_manager, known))
+    return issues
+
+
+def _validate_handler(
+    handler: HandlerObject,
+    router: Router,
+    di_manager: DIManager,
+    known: frozenset[str],
+) -> list[GraphIssue]:
+    handler_name = get_callable_name(handler.callback)
+    try:
+        plan = di_manager.get_handler_plan(handler, router)
+    except DependencyCycleError as e:
+        path = tuple(get_callable_name(call) for call in e.path)
+        return [GraphIssue("cycle", handler_name, path, "dependency cycle")]
+    except Exception as e:
+        return [GraphIssue("invalid", handler_name, (), str(e))]
+
+    walker = _GraphWalker(handler_name, known)
+    roots = [
+        *range(plan.handler_dependencies_end),
+        *(index for _, index in plan.handler_params),
+    ]
+    for index in roots:
+        walker.walk(plan.nodes, index, (), "update")
+    return walker.issues
+
+
+class _GraphWalker:
+    __slots__ = ("_handler_name", "_known", "_visited", "issues")
+
+    def __init__(self, handler_name: str, known: frozenset[str]) -> None:
+        self._handler_name = handler_name
+        self._known = known
+        self._visited: set[tuple[int, int, Scope]] = set()
+        self.issues: list[GraphIssue] = []
+
+    def walk(
+        self,
+        nodes: Sequence[DependencyNode],
+        index: int,
+        path: tuple[str, ...],
+        outer_scope: Scope,
+    ) -> None:
+        node = nodes[index]
+        # Update scoped nodes of a scoped dependency live as long as it does.
+        scope = outer_scope if node.scope == "update" else node.scope
+        visited_key = (id(nodes), index, scope)
+        if visited_key in self._visited:
+            return
+        self._visited.add(visited_key)
+
+        path = (*path, get_callable_name(node.call))
+        for param_name in node.data_params:
+            if param_name not in self._known:
+                self._report(
+                    "unresolved",
+                    path,
+                    f"`{param_name}` is not provided by middleware data",
+                )
+
+        if node.scope != "update" and not _can_depend(outer_scope, node.scope):
+            self._report(
+                "scope",
+                path,
+                f"{node.scope} scoped dependency used by a {outer_scope} scoped one",
+            )
+        if scope != "update":
+            if node.event_param:
+                self._report("scope", path, f"`event` used in {scope} scope")
+            for param_name in node.data_params:
+                if (
+                    param_name in UPDATE_DATA_KEYS
+                    and param_name != SCOPE_DATA_KEYS.get(scope)
+                ):
+                    self._report("scope", path, f"`{param_name}` used in {scope} scope")
+
+        children = node.scoped_nodes if node.scope != "update" else nodes
+        for _, child_index in node.dependency_params:
+            self.walk(children, child_index, path, scope)
+
+    def _report(self, kind: IssueKind, path: tuple[str, ...], message: str) -> None:
+        self.issues.append(GraphIssue(kind, self._handler_name, path, message))
+
+
+def _can_depend(scope: Scope, dependency_scope: Scope) -> bool:
+    # A value stored in a scope may only use values that live at least as
+    # long and are shared by the same updates.
+    return scope == "update" or dependency_scope in ("app", scope)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m aiogram3_di",
+        description="Validate the dependency graphs of every handler.",
+    )
+    parser.add_argument("router", help="router or dispatcher, as module:attribute")
+    parser.add_argument(
+        "--known-param",
+        action="append",
+        default=[],
+        dest="known_params",
+        help="middleware data key provided by your own middlewares",
+    )
+    args = parser.parse_args(argv)
+
+    module_name, _, attribute = args.router.partition(":")
+    sys.path.insert(0, os.getcwd())
+    router = getattr(importlib.import_module(module_name), attribute or "dp")
+    if isinstance(router, Dispatcher) and "di_manager" in router.workflow_data:
+        di_manager = router["di_manager"]
+    else:
+        di_manager = DIManager(dependency_overrides={})
+
+    issues = validate_graph(router, di_manager, known_params=args.known_params)
+    for issue in issues:
+        print(issue)
+    return 1 if issues else 0
@@ -1,7 +1,43 @@
+from collections.abc import Awaitable, Callable
+from contextlib import AsyncExitStack
+from typing import Any, TypeAlias
+
 import pytest
 from aiogram import Dispatcher
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.types import TelegramObject
+
+from aiogram3_di.resolver import DependenciesResolver
+
+ResolveData: TypeAlias = Callable[[dict[str, Any]], Awaitable[dict[str, Any]]]
+Resolve: TypeAlias = Callable[..., Awaitable[dict[str, Any]]]
 
 
 @pytest.fixture()
 def dp() -> Dispatcher:
     return Dispatcher()
+
+
+@pytest.fixture()
+def resolve_data() -> ResolveData:
+    async def resolve_data(middleware_data: dict[str, Any]) -> dict[str, Any]:
+        async with AsyncExitStack() as stack:
+            resolver = DependenciesResolver(
+                stack,
+                handler_dependencies=(),
+                event=TelegramObject(),
+                middleware_data=middleware_data,
+            )
+            return await resolver.resolve()
+
+    return resolve_data
+
+
+@pytest.fixture()
+def resolve(dp: Dispatcher, resolve_data: ResolveData) -> Resolve:
+    async def resolve(handler: Callable[..., Any], /, **data: Any) -> dict[str, Any]:
+        return await resolve_data(
+            dp.workflow_data | {"handler": HandlerObject(handler), **data}
+        )
+
+    return resolve
@@ -0,0 +1,71 @@
+import asyncio
+from typing import Annotated
+
+import pytest
+from aiogram import Dispatcher
+from aiogram.types import User
+
+from aiogram3_di import BatchDepends, setup_di
+from aiogram3_di.batch import BatchLoader
+
+from conftest import Resolve
+
+batches: list[list[int]] = []
+
+
+async def load_names(user_ids: list[int]) -> dict[int, str]:
+    batches.append(user_ids)
+    return {user_id: f"user {user_id}" for user_id in user_ids if user_id > 0}
+
+
+async def start(
+    name: Annotated[
+        str,
+        BatchDepends(load_names, key=lambda event_from_user: event_from_user.id),
+    ],
+) -> None:
+    pass
+
+
+def user(user_id: int) -> User:
+    return User(id=user_id, is_bot=False, first_name="Vladyslav")
+
+
+@pytest.mark.asyncio
+async def test_batch(dp: Dispatcher, resolve: Resolve) -> None:
+    batches.clear()
+    setup_di(dp)
+
+    results = await asyncio.gather(
+        *(resolve(start, event_from_user=user(user_id)) for user_id in (1, 2, 1))
+    )
+
+    assert [result["name"] for result in results] == ["user 1", "user 2", "user 1"]
+    assert batches == [[1, 2]]
+
+
+@pytest.mark.asyncio
+async def test_batch_max_size() -> None:
+    batches.clear()
+    loader = BatchLoader(load_names, key=lambda user_id: user_id, max_batch_size=2)
+
+    results = await asyncio.gather(*(loader.load(user_id) for user_id in (1, 2, 3)))
+
+    assert results == ["user 1", "user 2", "user 3"]
+    assert batches == [[1, 2], [3]]
+
+
+@pytest.mark.asyncio
+async def test_batch_errors() -> None:
+    async def load_list(user_ids: list[int]) -> list[str]:
+        return ["user"]
+
+    missing = BatchLoader(load_names, key=lambda user_id: user_id)
+    with pytest.raises(KeyError):
+        await missing.load(-1)
+
+    mismatched = BatchLoader(load_list, key=lambda user_id: user_id)
+    results = await asyncio.gather(
+        mismatched.load(1), mismatched.load(2), return_exceptions=True
+    )
+    assert all(isinstance(result, ValueError) for result in results)
@@ -42,4 +42,4 @@ async def test_cache(dp: Dispatcher) -> None:
 
     mocked_get_user_full_name.assert_called_once()
     assert middleware_data["full_name"] == "Vladyslav Timofeev"
-    assert resolver._cache == {hash(mocked_get_user_full_name): "Vladyslav Timofeev"}
+    assert resolver._values == ["Vladyslav Timofeev"]
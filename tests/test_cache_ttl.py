@@ -0,0 +1,101 @@
+import asyncio
+from typing import Annotated
+
+import pytest
+from aiogram import Dispatcher
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.types import TelegramObject, User
+
+from aiogram3_di import Depends, setup_di
+
+from conftest import Resolve
+
+calls: list[int] = []
+
+
+async def get_user_settings(event_from_user: User) -> str:
+    calls.append(event_from_user.id)
+    await asyncio.sleep(0.01)
+    return f"settings {event_from_user.id}"
+
+
+async def start(
+    settings: Annotated[
+        str,
+        Depends(
+            get_user_settings,
+            cache_ttl=0.1,
+            cache_key=lambda event_from_user: event_from_user.id,
+        ),
+    ],
+) -> None:
+    pass
+
+
+def user(user_id: int) -> User:
+    return User(id=user_id, is_bot=False, first_name="Vladyslav")
+
+
+@pytest.mark.asyncio
+async def test_cache_ttl(dp: Dispatcher, resolve: Resolve) -> None:
+    calls.clear()
+    setup_di(dp)
+
+    results = await asyncio.gather(
+        *(resolve(start, event_from_user=user(1)) for _ in range(5))
+    )
+    await resolve(start, event_from_user=user(2))
+
+    assert [result["settings"] for result in results] == ["settings 1"] * 5
+    assert calls == [1, 2]
+
+    await asyncio.sleep(0.1)
+    await resolve(start, event_from_user=user(1))
+
+    assert calls == [1, 2, 1]
+
+
+def test_cache_ttl_invalid() -> None:
+    with pytest.raises(ValueError):
+        Depends(get_user_settings, cache_key=lambda event_from_user: 0)
+    with pytest.raises(ValueError):
+        Depends(get_user_settings, cache_ttl=30, scope="app")
+
+
+def get_limits(config: dict[str, int]) -> int:
+    calls.append(config["limit"])
+    return config["limit"]
+
+
+async def limits(
+    limit: Annotated[int, Depends(get_limits, run="inline", cache_ttl=30)],
+) -> None:
+    pass
+
+
+@pytest.mark.asyncio
+async def test_cache_ttl_unhashable(dp: Dispatcher, resolve: Resolve) -> None:
+    calls.clear()
+    setup_di(dp)
+
+    for _ in range(2):
+        assert (await resolve(limits, config={"limit": 5}))["limit"] == 5
+
+    assert calls == [5, 5]
+
+
+def get_event_type(event: TelegramObject) -> str:
+    return type(event).__name__
+
+
+async def event_type(
+    value: Annotated[str, Depends(get_event_type, cache_ttl=30)],
+) -> None:
+    pass
+
+
+def test_cache_ttl_event(dp: Dispatcher) -> None:
+    di_manager = setup_di(dp)
+
+    with pytest.raises(ValueError):
+        di_manager.get_plan(HandlerObject(event_type), ())
@@ -0,0 +1,74 @@
+from typing import Annotated
+
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.types import Message, User
+
+from aiogram3_di import Depends
+from aiogram3_di.plan import CallKind, DependencyNode, DependencyPlan, compile_plan
+
+
+def get_user_first_name(event_from_user: User) -> str:
+    return event_from_user.first_name
+
+
+async def get_user_last_name(event_from_user: User) -> str | None:
+    return event_from_user.last_name
+
+
+def get_user_full_name(
+    first_name: Annotated[str, Depends(get_user_first_name)],
+    last_name: Annotated[str | None, Depends(get_user_last_name)],
+) -> str:
+    if last_name is not None:
+        return f"{first_name} {last_name}"
+    return first_name
+
+
+def verify_user(first_name: Annotated[str, Depends(get_user_first_name)]) -> None:
+    pass
+
+
+async def start(
+    message: Message, full_name: Annotated[str, Depends(get_user_full_name)]
+) -> None:
+    await message.answer(f"Hi {full_name}")
+
+
+def test_compile_plan() -> None:
+    plan = compile_plan(HandlerObject(start), (Depends(verify_user),), {})
+
+    assert plan == DependencyPlan(
+        nodes=(
+            DependencyNode(
+                call=get_user_first_name,
+                kind=CallKind.SYNC,
+                run="thread",
+                data_params=("event_from_user",),
+                dependency_params=(),
+            ),
+            DependencyNode(
+                call=verify_user,
+                kind=CallKind.SYNC,
+                run="thread",
+                data_params=(),
+                dependency_params=(("first_name", 0),),
+            ),
+            DependencyNode(
+                call=get_user_last_name,
+                kind=CallKind.COROUTINE,
+                run="inline",
+                data_params=("event_from_user",),
+                dependency_params=(),
+            ),
+            DependencyNode(
+                call=get_user_full_name,
+                kind=CallKind.SYNC,
+                run="thread",
+                data_params=(),
+                dependency_params=(("first_name", 0), ("last_name", 2)),
+            ),
+        ),
+        handler_params=(("full_name", 3),),
+        handler_dependencies_end=2,
+        has_teardown=False,
+    )
@@ -0,0 +1,66 @@
+import asyncio
+from collections.abc import AsyncIterator
+from typing import Annotated
+
+import pytest
+from aiogram import Dispatcher
+
+from aiogram3_di import Depends, setup_di
+
+from conftest import Resolve
+
+events: list[str] = []
+user_started = asyncio.Event()
+settings_started = asyncio.Event()
+
+
+async def get_session() -> AsyncIterator[str]:
+    events.append("enter session")
+    yield "session"
+    events.append("exit session")
+
+
+async def get_redis() -> AsyncIterator[str]:
+    events.append("enter redis")
+    yield "redis"
+    events.append("exit redis")
+
+
+async def get_user(session: Annotated[str, Depends(get_session)]) -> str:
+    # Completes only if get_settings runs at the same time.
+    user_started.set()
+    await asyncio.wait_for(settings_started.wait(), 1)
+    return f"user from {session}"
+
+
+async def get_settings(redis: Annotated[str, Depends(get_redis)]) -> str:
+    settings_started.set()
+    await asyncio.wait_for(user_started.wait(), 1)
+    return f"settings from {redis}"
+
+
+async def start(
+    user: Annotated[str, Depends(get_user)],
+    settings: Annotated[str, Depends(get_settings)],
+) -> None:
+    pass
+
+
+@pytest.mark.asyncio
+async def test_concurrency_graph(dp: Dispatcher, resolve: Resolve) -> None:
+    events.clear()
+    user_started.clear()
+    settings_started.clear()
+    setup_di(dp, concurrency="graph")
+
+    middleware_data = await resolve(start)
+
+    assert middleware_data["user"] == "user from session"
+    assert middleware_data["settings"] == "settings from redis"
+    assert sorted(events[:2]) == ["enter redis", "enter session"]
+    assert events[2:] == ["exit redis", "exit session"]
+
+
+def test_concurrency_invalid(dp: Dispatcher) -> None:
+    with pytest.raises(ValueError):
+        setup_di(dp, concurrency="threads")
@@ -0,0 +1,56 @@
+from typing import Annotated
+
+import pytest
+from aiogram import Dispatcher
+from aiogram.dispatcher.event.handler import HandlerObject
+
+from aiogram3_di import Depends, setup_di
+
+from conftest import Resolve
+
+
+class CollidingDependency:
+    __slots__ = ("_value",)
+
+    def __init__(self, value: str) -> None:
+        self._value = value
+
+    def __hash__(self) -> int:
+        return 0
+
+    def __call__(self) -> str:
+        return self._value
+
+
+class UnhashableDependency:
+    __hash__ = None
+
+    def __call__(self) -> str:
+        return "unhashable"
+
+
+get_first = CollidingDependency("first")
+get_second = CollidingDependency("second")
+get_unhashable = UnhashableDependency()
+
+
+async def start(
+    first: Annotated[str, Depends(get_first)],
+    second: Annotated[str, Depends(get_second)],
+    unhashable: Annotated[str, Depends(get_unhashable)],
+    unhashable_again: Annotated[str, Depends(get_unhashable)],
+) -> None:
+    pass
+
+
+@pytest.mark.asyncio
+async def test_dependency_identity(dp: Dispatcher, resolve: Resolve) -> None:
+    di_manager = setup_di(dp)
+
+    middleware_data = await resolve(start)
+
+    assert middleware_data["first"] == "first"
+    assert middleware_data["second"] == "second"
+    assert middleware_data["unhashable"] == "unhashable"
+    assert middleware_data["unhashable_again"] == "unhashable"
+    assert len(di_manager.get_plan(HandlerObject(start), ()).nodes) == 3
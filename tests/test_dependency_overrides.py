@@ -1,12 +1,14 @@
-from contextlib import AsyncExitStack
-from typing import Annotated
+import asyncio
+from typing import Annotated, Any
 
 import pytest
 from aiogram import Dispatcher
-from aiogram.types import Message, User, TelegramObject
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.types import Message, User
 
 from aiogram3_di import Depends, setup_di
-from aiogram3_di.resolver import DependenciesResolver
+
+from conftest import Resolve
 
 
 def get_user_full_name(event_from_user: User) -> str:
@@ -23,22 +25,82 @@ def get_username(event_from_user: User) -> str:
     return event_from_user.username
 
 
+def test_dependency_overrides(dp: Dispatcher) -> None:
+    di_manager = setup_di(dp, dependency_overrides={get_user_full_name: get_username})
+    handler = HandlerObject(start)
+
+    plan = di_manager.get_plan(handler, ())
+
+    assert plan.nodes[0].call == get_username
+
+
+def test_dependency_overrides_rebuild_plan(dp: Dispatcher) -> None:
+    di_manager = setup_di(dp)
+    handler = HandlerObject(start)
+
+    plan = di_manager.get_plan(handler, ())
+    assert di_manager.get_plan(handler, ()) is plan
+    assert plan.nodes[0].call == get_user_full_name
+
+    di_manager.dependency_overrides = {get_user_full_name: get_username}
+
+    assert di_manager.get_plan(handler, ()).nodes[0].call == get_username
+
+
+def test_dependency_overrides_mutation(dp: Dispatcher) -> None:
+    di_manager = setup_di(dp)
+    handler = HandlerObject(start)
+
+    assert di_manager.get_plan(handler, ()).nodes[0].call == get_user_full_name
+
+    di_manager.dependency_overrides[get_user_full_name] = get_username
+    assert di_manager.get_plan(handler, ()).nodes[0].call == get_username
+
+    del di_manager.dependency_overrides[get_user_full_name]
+    assert di_manager.get_plan(handler, ()).nodes[0].call == get_user_full_name
+
+
+def get_nickname(event_from_user: User) -> str:
+    return f"@{event_from_user.username}"
+
+
+def test_dependency_overrides_context(dp: Dispatcher) -> None:
+    di_manager = setup_di(dp)
+    handler = HandlerObject(start)
+    plan = di_manager.get_plan(handler, ())
+
+    with di_manager.override({get_user_full_name: get_username}):
+        override_plan = di_manager.get_plan(handler, ())
+        assert override_plan.nodes[0].call == get_username
+
+        with di_manager.override({get_user_full_name: get_nickname}):
+            assert di_manager.get_plan(handler, ()).nodes[0].call == get_nickname
+
+        assert di_manager.get_plan(handler, ()) is override_plan
+
+    assert di_manager.get_plan(handler, ()) is plan
+
+    with di_manager.override({get_user_full_name: get_username}):
+        assert di_manager.get_plan(handler, ()) is override_plan
+
+
 @pytest.mark.asyncio
-async def test_dependency_overrides(dp: Dispatcher) -> None:
-    setup_di(dp, dependency_overrides={get_user_full_name: get_username})
-    handler_dependencies = ()
-    event = TelegramObject()
-    middleware_data = dp.workflow_data
-
-    async with AsyncExitStack() as stack:
-        resolver = DependenciesResolver(
-            stack,
-            handler_dependencies=handler_dependencies,
-            event=event,
-            middleware_data=middleware_data,
-        )
-        call = resolver._get_call(
-            dependency=Depends(get_user_full_name), type_annotation=str
-        )
-
-    assert call == get_username
+async def test_dependency_overrides_context_concurrent(
+    dp: Dispatcher, resolve: Resolve
+) -> None:
+    di_manager = setup_di(dp)
+    user = User(id=42, is_bot=False, first_name="Vladyslav", username="vlad")
+    started = asyncio.Event()
+
+    async def resolve_canary() -> dict[str, Any]:
+        with di_manager.override({get_user_full_name: get_nickname}):
+            started.set()
+            await asyncio.sleep(0)
+            return await resolve(start, event_from_user=user)
+
+    canary = asyncio.create_task(resolve_canary())
+    await started.wait()
+    middleware_data = await resolve(start, event_from_user=user)
+
+    assert middleware_data["full_name"] == "Vladyslav"
+    assert (await canary)["full_name"] == "@vlad"
@@ -43,4 +43,4 @@ async def test_disable_cache(dp: Dispatcher) -> None:
 
     assert mocked_get_user_full_name.call_count == 2
     assert middleware_data["full_name"] == "Vlad Timofeev"
-    assert resolver._cache == {hash(mocked_get_user_full_name): "Vladyslav Timofeev"}
+    assert resolver._values == ["Vladyslav Timofeev", "Vlad Timofeev"]
@@ -0,0 +1,100 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Annotated
+
+import pytest
+from aiogram import Dispatcher
+
+from aiogram3_di import Depends, DependencyExecutor, setup_di
+
+from conftest import Resolve
+
+
+def get_thread_name() -> str:
+    return threading.current_thread().name
+
+
+async def start(thread_name: Annotated[str, Depends(get_thread_name)]) -> None:
+    pass
+
+
+@pytest.mark.asyncio
+async def test_executor(dp: Dispatcher, resolve: Resolve) -> None:
+    executor = DependencyExecutor(max_workers=1)
+    setup_di(dp, executor=executor)
+
+    middleware_data = await resolve(start)
+
+    assert middleware_data["thread_name"].startswith("aiogram3_di")
+    assert executor.stats.completed == 1
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_executor_stats() -> None:
+    executor = DependencyExecutor(max_workers=1, max_queue_size=1)
+    release = threading.Event()
+
+    tasks = [asyncio.create_task(executor.run(release.wait)) for _ in range(3)]
+    await asyncio.sleep(0.05)
+
+    stats = executor.stats
+    assert stats.active_workers == 1
+    assert stats.queue_depth == 2
+
+    release.set()
+    await asyncio.gather(*tasks)
+
+    stats = executor.stats
+    assert stats.active_workers == 0
+    assert stats.queue_depth == 0
+    assert stats.completed == 3
+    assert stats.max_wait_time > 0
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_executor_cancel() -> None:
+    executor = DependencyExecutor(max_workers=1, max_queue_size=1)
+    release = threading.Event()
+
+    running = asyncio.create_task(executor.run(release.wait))
+    queued = asyncio.create_task(executor.run(release.wait))
+    await asyncio.sleep(0.05)
+    queued.cancel()
+    await asyncio.gather(queued, return_exceptions=True)
+
+    assert executor.stats.queue_depth == 0
+
+    release.set()
+    await running
+    await executor.run(release.wait)
+    assert executor.stats.completed == 2
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_executor_restart(dp: Dispatcher, resolve: Resolve) -> None:
+    executor = DependencyExecutor(max_workers=1)
+    setup_di(dp, executor=executor)
+
+    await resolve(start)
+    await dp.emit_shutdown()
+    middleware_data = await resolve(start)
+
+    assert middleware_data["thread_name"].startswith("aiogram3_di")
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_executor_submit_error() -> None:
+    pool = ThreadPoolExecutor(max_workers=1)
+    executor = DependencyExecutor(executor=pool, max_queue_size=1)
+    pool.shutdown()
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            await executor.run(get_thread_name)
+
+    assert executor.stats.queue_depth == 0
@@ -0,0 +1,63 @@
+import gc
+import weakref
+from typing import Annotated
+
+from aiogram.types import User
+
+from aiogram3_di import Depends
+from aiogram3_di.utils import (
+    CallableInfo,
+    CallKind,
+    ParameterInfo,
+    _callable_infos,
+    get_callable_info,
+)
+
+
+def get_user_first_name(event_from_user: User) -> str:
+    return event_from_user.first_name
+
+
+async def get_user_full_name(
+    first_name: Annotated[str, Depends(get_user_first_name)],
+    last_name: str | None = None,
+) -> str:
+    return f"{first_name} {last_name}"
+
+
+def test_get_callable_info() -> None:
+    info = get_callable_info(get_user_full_name)
+
+    assert info == CallableInfo(
+        kind=CallKind.COROUTINE,
+        parameters=(
+            ParameterInfo(
+                name="first_name",
+                required=True,
+                dependency=Depends(get_user_first_name),
+                type_annotation=str,
+            ),
+            ParameterInfo(
+                name="last_name",
+                required=False,
+                dependency=None,
+                type_annotation=str | None,
+            ),
+        ),
+        required_params=frozenset({"first_name"}),
+    )
+    assert get_callable_info(get_user_full_name) is info
+
+
+def test_get_callable_info_weakref() -> None:
+    def get_username(event_from_user: User) -> str | None:
+        return event_from_user.username
+
+    get_callable_info(get_username)
+    assert get_username in _callable_infos
+
+    ref = weakref.ref(get_username)
+    del get_username
+    gc.collect()
+
+    assert ref() is None
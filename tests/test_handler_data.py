@@ -0,0 +1,44 @@
+from typing import Annotated
+
+import pytest
+from aiogram import Dispatcher
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.types import Message, TelegramObject
+
+from aiogram3_di import Depends, setup_di
+
+from conftest import ResolveData
+
+
+def get_event_type(event: TelegramObject) -> str:
+    return type(event).__name__
+
+
+async def start(event_type: Annotated[str, Depends(get_event_type)]) -> None:
+    pass
+
+
+async def echo(message: Message) -> None:
+    pass
+
+
+@pytest.mark.asyncio
+async def test_handler_data(dp: Dispatcher, resolve_data: ResolveData) -> None:
+    setup_di(dp)
+    middleware_data = dp.workflow_data | {"handler": HandlerObject(start)}
+
+    handler_data = await resolve_data(middleware_data)
+
+    assert handler_data == middleware_data | {"event_type": "TelegramObject"}
+    assert "event_type" not in middleware_data
+    assert "event" not in handler_data
+
+
+@pytest.mark.asyncio
+async def test_handler_data_without_dependencies(
+    dp: Dispatcher, resolve_data: ResolveData
+) -> None:
+    setup_di(dp)
+    middleware_data = dp.workflow_data | {"handler": HandlerObject(echo)}
+
+    assert await resolve_data(middleware_data) is middleware_data
@@ -0,0 +1,115 @@
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Annotated, Any
+
+import pytest
+from aiogram import BaseMiddleware, Bot, Dispatcher
+from aiogram.enums import ChatType
+from aiogram.filters import Filter
+from aiogram.types import Chat, Message, TelegramObject, Update, User
+
+from aiogram3_di import Depends, inject, setup_di
+
+events: list[str] = []
+
+
+async def get_session() -> AsyncIterator[str]:
+    events.append("open session")
+    yield "session"
+    events.append("close session")
+
+
+async def get_db_user(
+    event_from_user: User, session: Annotated[str, Depends(get_session)]
+) -> str:
+    events.append("load user")
+    return f"{event_from_user.first_name} from {session}"
+
+
+@inject
+async def get_locale(
+    event: TelegramObject, db_user: Annotated[str, Depends(get_db_user)]
+) -> str:
+    return "uk"
+
+
+class LocaleMiddleware(BaseMiddleware):
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        data["locale"] = await get_locale(event, **data)
+        return await handler(event, data)
+
+
+class IsRegistered(Filter):
+    async def __call__(
+        self, message: Message, db_user: Annotated[str, Depends(get_db_user)]
+    ) -> bool:
+        events.append("check user")
+        return db_user is not None
+
+
+def make_update() -> Update:
+    user = User(id=42, is_bot=False, first_name="Vladyslav")
+    chat = Chat(id=42, type=ChatType.PRIVATE)
+    return Update(
+        update_id=1,
+        message=Message(message_id=1, date=0, chat=chat, from_user=user, text="hi"),
+    )
+
+
+@pytest.mark.asyncio
+async def test_inject(dp: Dispatcher) -> None:
+    events.clear()
+
+    @dp.message(inject(IsRegistered()))
+    async def start(
+        message: Message,
+        locale: str,
+        db_user: Annotated[str, Depends(get_db_user)],
+    ) -> str:
+        events.append("handle")
+        return f"{db_user} ({locale})"
+
+    dp.message.outer_middleware(LocaleMiddleware())
+    setup_di(dp)
+
+    result = await dp.feed_update(Bot("42:TEST"), make_update())
+
+    assert result == "Vladyslav from session (uk)"
+    assert events == [
+        "open session",
+        "load user",
+        "check user",
+        "handle",
+        "close session",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_inject_function_filter(dp: Dispatcher) -> None:
+    events.clear()
+
+    @inject
+    def is_admin(
+        message: Message, db_user: Annotated[str, Depends(get_db_user)]
+    ) -> bool:
+        return False
+
+    @dp.message(is_admin)
+    async def admin(message: Message) -> None:
+        pass
+
+    setup_di(dp)
+
+    await dp.feed_update(Bot("42:TEST"), make_update())
+
+    assert events == ["open session", "load user", "close session"]
+
+
+@pytest.mark.asyncio
+async def test_inject_without_setup_di() -> None:
+    with pytest.raises(RuntimeError):
+        await get_locale(TelegramObject(), di_manager=setup_di(Dispatcher()))
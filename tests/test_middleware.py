@@ -0,0 +1,112 @@
+from collections.abc import Awaitable, Callable
+from typing import Annotated, Any
+
+import pytest
+from aiogram import Bot, Dispatcher, Router
+from aiogram.dispatcher.event.bases import SkipHandler
+from aiogram.enums import ChatType
+from aiogram.types import Chat, Message, TelegramObject, Update, User
+
+from aiogram3_di import Depends, middleware, setup_di
+
+
+def get_user_first_name(event_from_user: User) -> str:
+    return event_from_user.first_name
+
+
+def make_update() -> Update:
+    user = User(id=42, is_bot=False, first_name="Vladyslav")
+    chat = Chat(id=42, type=ChatType.PRIVATE)
+    return Update(
+        update_id=1,
+        message=Message(message_id=1, date=0, chat=chat, from_user=user, text="hi"),
+    )
+
+
+@pytest.mark.asyncio
+async def test_middleware_without_dependencies(
+    dp: Dispatcher, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    @dp.message()
+    async def echo(message: Message) -> str:
+        return message.text
+
+    setup_di(dp)
+
+    def resolver(*args: Any, **kwargs: Any) -> None:
+        raise AssertionError("the resolver must not be created")
+
+    monkeypatch.setattr(middleware, "DependenciesResolver", resolver)
+
+    assert await dp.feed_update(Bot("42:TEST"), make_update()) == "hi"
+
+
+@pytest.mark.asyncio
+async def test_middleware_router_included_later(dp: Dispatcher) -> None:
+    setup_di(dp, allowed_updates=["message"])
+    router = Router()
+
+    @router.message()
+    async def start(
+        message: Message,
+        first_name: Annotated[str, Depends(get_user_first_name, run="inline")],
+    ) -> str:
+        return first_name
+
+    dp.include_router(router)
+
+    assert await dp.feed_update(Bot("42:TEST"), make_update()) == "Vladyslav"
+
+
+@pytest.mark.asyncio
+async def test_middleware_without_teardown(
+    dp: Dispatcher, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    @dp.message()
+    async def start(
+        message: Message,
+        first_name: Annotated[str, Depends(get_user_first_name, run="inline")],
+    ) -> str:
+        return first_name
+
+    setup_di(dp)
+
+    def stack() -> None:
+        raise AssertionError("the exit stack must not be created")
+
+    monkeypatch.setattr(middleware, "AsyncExitStack", stack)
+
+    assert await dp.feed_update(Bot("42:TEST"), make_update()) == "Vladyslav"
+    assert not middleware._NO_TEARDOWN._exit_callbacks
+
+
+@pytest.mark.asyncio
+async def test_middleware_data_not_copied(dp: Dispatcher) -> None:
+    seen: list[dict[str, Any]] = []
+
+    async def capture(
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        seen.append(data)
+        return await handler(event, data)
+
+    @dp.message()
+    async def skipped(
+        message: Message,
+        first_name: Annotated[str, Depends(get_user_first_name, run="inline")],
+    ) -> None:
+        raise SkipHandler
+
+    @dp.message()
+    async def start(message: Message, first_name: str = "unknown") -> str:
+        return first_name
+
+    dp.message.middleware(capture)
+    setup_di(dp)
+    dp.message.middleware(capture)
+
+    assert await dp.feed_update(Bot("42:TEST"), make_update()) == "unknown"
+    assert seen[0] is seen[1]
+    assert "first_name" not in seen[0]
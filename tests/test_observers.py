@@ -0,0 +1,205 @@
+from collections.abc import AsyncIterator
+from typing import Annotated, Any
+
+import pytest
+from aiogram import Dispatcher
+
+from aiogram3_di import (
+    Depends,
+    DependencyObserver,
+    MetricsObserver,
+    TracingObserver,
+    setup_di,
+)
+from aiogram3_di.plan import DependencyNode
+
+from conftest import Resolve
+
+
+async def get_session() -> AsyncIterator[str]:
+    yield "session"
+
+
+def get_config() -> str:
+    return "config"
+
+
+async def start(
+    session: Annotated[str, Depends(get_session)],
+    config: Annotated[str, Depends(get_config, scope="app", run="inline")],
+) -> None:
+    pass
+
+
+class RecordingObserver(DependencyObserver):
+    __slots__ = ("events",)
+
+    def __init__(self) -> None:
+        self.events: list[tuple[Any, ...]] = []
+
+    def on_dependency_start(self, node: DependencyNode) -> Any:
+        self.events.append(("start", node.call))
+        return node.call.__name__
+
+    def on_dependency_end(
+        self,
+        node: DependencyNode,
+        state: Any,
+        *,
+        duration: float,
+        cache_hit: bool,
+        error: BaseException | None,
+    ) -> None:
+        assert duration >= 0
+        self.events.append(("end", state, cache_hit, error))
+
+    def on_teardown(
+        self,
+        node: DependencyNode,
+        *,
+        duration: float,
+        error: BaseException | None,
+    ) -> None:
+        assert duration >= 0
+        self.events.append(("teardown", node.call, error))
+
+
+class FailingObserver(DependencyObserver):
+    __slots__ = ()
+
+    def on_dependency_start(self, node: DependencyNode) -> Any:
+        raise RuntimeError
+
+    def on_dependency_end(
+        self, node: DependencyNode, state: Any, **kwargs: Any
+    ) -> None:
+        raise RuntimeError
+
+    def on_teardown(self, node: DependencyNode, **kwargs: Any) -> None:
+        raise RuntimeError
+
+
+class Span:
+    def __init__(self, name: str, attributes: dict[str, Any], **kwargs: Any) -> None:
+        self.name = name
+        self.attributes = dict(attributes)
+        self.ended = False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_exception(self, exception: BaseException) -> None:
+        pass
+
+    def end(self, **kwargs: Any) -> None:
+        self.ended = True
+
+
+class Tracer:
+    def __init__(self) -> None:
+        self.spans: list[Span] = []
+
+    def start_span(self, name: str, **kwargs: Any) -> Span:
+        span = Span(name, **kwargs)
+        self.spans.append(span)
+        return span
+
+
+class Histogram:
+    def __init__(self) -> None:
+        self.observations: list[tuple[dict[str, str], float]] = []
+
+    def labels(self, **labels: str) -> "Histogram":
+        self._labels = labels
+        return self
+
+    def observe(self, value: float) -> None:
+        self.observations.append((self._labels, value))
+
+
+@pytest.mark.asyncio
+async def test_observers(dp: Dispatcher, resolve: Resolve) -> None:
+    observer = RecordingObserver()
+    setup_di(dp, observers=[observer])
+
+    await resolve(start)
+    await resolve(start)
+
+    assert observer.events == [
+        ("start", get_session),
+        ("end", "get_session", False, None),
+        ("start", get_config),
+        ("end", "get_config", False, None),
+        ("teardown", get_session, None),
+        ("start", get_session),
+        ("end", "get_session", False, None),
+        ("start", get_config),
+        ("end", "get_config", True, None),
+        ("teardown", get_session, None),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_observer_adapters(dp: Dispatcher, resolve: Resolve) -> None:
+    tracer = Tracer()
+    duration = Histogram()
+    teardown_duration = Histogram()
+    setup_di(
+        dp,
+        observers=[
+            TracingObserver(tracer),
+            MetricsObserver(duration, teardown_duration),
+        ],
+    )
+
+    await resolve(start)
+
+    assert [span.name for span in tracer.spans] == [
+        f"{__name__}.get_session",
+        f"{__name__}.get_config",
+        f"{__name__}.get_session teardown",
+    ]
+    assert all(span.ended for span in tracer.spans)
+    assert tracer.spans[1].attributes == {
+        "di.kind": "sync",
+        "di.run": "inline",
+        "di.scope": "app",
+        "di.cache_hit": False,
+    }
+    assert [labels for labels, _ in duration.observations] == [
+        {
+            "dependency": f"{__name__}.get_session",
+            "kind": "async_gen",
+            "run": "inline",
+            "cache_hit": "false",
+        },
+        {
+            "dependency": f"{__name__}.get_config",
+            "kind": "sync",
+            "run": "inline",
+            "cache_hit": "false",
+        },
+    ]
+    assert [labels for labels, _ in teardown_duration.observations] == [
+        {"dependency": f"{__name__}.get_session", "kind": "async_gen", "run": "inline"}
+    ]
+
+
+@pytest.mark.asyncio
+async def test_failing_observer(dp: Dispatcher, resolve: Resolve) -> None:
+    observer = RecordingObserver()
+    setup_di(dp, observers=[FailingObserver(), observer])
+
+    await resolve(start)
+
+    assert observer.events[-1] == ("teardown", get_session, None)
+
+    def get_broken() -> str:
+        raise ValueError
+
+    async def broken(value: Annotated[str, Depends(get_broken)]) -> None:
+        pass
+
+    with pytest.raises(ValueError):
+        await resolve(broken)
+    assert isinstance(observer.events[-1][-1], ValueError)
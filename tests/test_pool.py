@@ -0,0 +1,176 @@
+import asyncio
+from collections.abc import AsyncIterator, Callable
+from contextlib import AsyncExitStack
+from typing import Annotated, Any
+
+import pytest
+from aiogram import Dispatcher
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.types import TelegramObject
+
+from aiogram3_di import Depends, Pooled, ResourcePool, setup_di
+from aiogram3_di.resolver import DependenciesResolver
+
+from conftest import Resolve
+
+
+class Connections:
+    def __init__(self) -> None:
+        self.count = 0
+        self.events: list[str] = []
+
+    async def connect(self, dsn: str) -> AsyncIterator[str]:
+        self.count += 1
+        connection = f"{dsn}{self.count}"
+        self.events.append(f"open {connection}")
+        try:
+            yield connection
+        except ValueError:
+            self.events.append(f"rollback {connection}")
+            raise
+        self.events.append(f"close {connection}")
+
+
+async def get_connection(dsn: str) -> AsyncIterator[str]:
+    yield dsn
+
+
+async def resolve_in(
+    stack: AsyncExitStack, dp: Dispatcher, handler: Callable[..., Any]
+) -> dict[str, Any]:
+    resolver = DependenciesResolver(
+        stack,
+        handler_dependencies=(),
+        event=TelegramObject(),
+        middleware_data=dp.workflow_data
+        | {"handler": HandlerObject(handler), "dsn": "db"},
+    )
+    return await resolver.resolve()
+
+
+@pytest.mark.asyncio
+async def test_pool(dp: Dispatcher, resolve: Resolve) -> None:
+    connections = Connections()
+    pool = ResourcePool(connections.connect)
+
+    async def start(connection: Annotated[str, Depends(pool)]) -> None:
+        pass
+
+    setup_di(dp)
+    first = await resolve(start, dsn="db")
+    second = await resolve(start, dsn="db")
+
+    assert first["connection"] == second["connection"] == "db1"
+    assert connections.events == ["open db1"]
+    assert pool.stats.size == pool.stats.idle == pool.stats.created == 1
+
+    await dp.emit_shutdown()
+
+    assert connections.events == ["open db1", "close db1"]
+    assert pool.stats.size == 0
+
+
+@pytest.mark.asyncio
+async def test_pool_max_size(dp: Dispatcher, resolve: Resolve) -> None:
+    connections = Connections()
+    pool = ResourcePool(connections.connect, max_size=1)
+    release = asyncio.Event()
+
+    async def hold(connection: Annotated[str, Depends(pool)]) -> None:
+        pass
+
+    async def hold_connection() -> dict[str, Any]:
+        async with AsyncExitStack() as stack:
+            data = await resolve_in(stack, dp, hold)
+            await release.wait()
+            return data
+
+    setup_di(dp)
+    first = asyncio.create_task(hold_connection())
+    await asyncio.sleep(0.01)
+    second = asyncio.create_task(resolve(hold, dsn="db"))
+    await asyncio.sleep(0.01)
+
+    assert pool.stats.in_use == pool.stats.waiting == 1
+
+    release.set()
+    assert (await first)["connection"] == (await second)["connection"]
+    assert pool.stats.created == 1
+
+    await dp.emit_shutdown()
+
+
+@pytest.mark.asyncio
+async def test_pool_error(dp: Dispatcher, resolve: Resolve) -> None:
+    connections = Connections()
+    pool = ResourcePool(connections.connect)
+
+    async def start(connection: Annotated[str, Depends(pool)]) -> None:
+        pass
+
+    setup_di(dp)
+    with pytest.raises(ValueError):
+        async with AsyncExitStack() as stack:
+            await resolve_in(stack, dp, start)
+            raise ValueError
+
+    assert connections.events == ["open db1", "rollback db1"]
+    assert (await resolve(start, dsn="db"))["connection"] == "db2"
+    assert pool.stats.discarded == 1
+
+    await dp.emit_shutdown()
+
+
+@pytest.mark.asyncio
+async def test_pool_check(dp: Dispatcher, resolve: Resolve) -> None:
+    connections = Connections()
+    broken = {"db1"}
+
+    async def check(connection: str) -> bool:
+        return connection not in broken
+
+    async def start(
+        connection: Annotated[str, Pooled(connections.connect, check=check)],
+    ) -> None:
+        pass
+
+    setup_di(dp)
+    assert (await resolve(start, dsn="db"))["connection"] == "db1"
+    assert (await resolve(start, dsn="db"))["connection"] == "db2"
+    assert (await resolve(start, dsn="db"))["connection"] == "db2"
+    assert connections.events == ["open db1", "close db1", "open db2"]
+
+    await dp.emit_shutdown()
+
+
+@pytest.mark.asyncio
+async def test_pool_idle_timeout(dp: Dispatcher, resolve: Resolve) -> None:
+    connections = Connections()
+    pool = ResourcePool(connections.connect, min_size=1, idle_timeout=0.01)
+
+    async def start(connection: Annotated[str, Depends(pool)]) -> None:
+        pass
+
+    setup_di(dp)
+    await resolve(start, dsn="db")
+    await asyncio.sleep(0.02)
+
+    # Resources up to min_size do not expire.
+    assert (await resolve(start, dsn="db"))["connection"] == "db1"
+    assert pool.stats.size == 1
+
+    await dp.emit_shutdown()
+
+
+def test_pool_invalid() -> None:
+    async def get_value() -> str:
+        return "value"
+
+    with pytest.raises(ValueError):
+        ResourcePool(get_value)  # type: ignore[arg-type]
+    with pytest.raises(ValueError):
+        ResourcePool(get_connection, max_size=0)
+    with pytest.raises(ValueError):
+        ResourcePool(get_connection, min_size=2, max_size=1)
+    with pytest.raises(ValueError):
+        ResourcePool(get_connection, idle_timeout=0)
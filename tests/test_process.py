@@ -0,0 +1,106 @@
+import os
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from typing import Annotated, Any
+
+import pytest
+from aiogram import Bot, Dispatcher
+from aiogram.dispatcher.event.handler import HandlerObject
+
+from aiogram3_di import Depends, setup_di
+
+from conftest import Resolve
+
+
+def get_pid() -> int:
+    return os.getpid()
+
+
+def get_square(value: int) -> int:
+    return value * value
+
+
+async def start(
+    pid: Annotated[int, Depends(get_pid, run="process")],
+    square: Annotated[int, Depends(get_square, run="process")],
+) -> None:
+    pass
+
+
+@pytest.mark.asyncio
+async def test_process(dp: Dispatcher, resolve: Resolve) -> None:
+    di_manager = setup_di(dp, process_workers=1)
+
+    middleware_data = await resolve(start, value=3)
+
+    assert middleware_data["pid"] != os.getpid()
+    assert middleware_data["square"] == 9
+
+    process_executor = di_manager.process_executor
+    await dp.emit_shutdown()
+    assert di_manager.process_executor is not process_executor
+
+    assert (await resolve(start, value=4))["square"] == 16
+    await dp.emit_shutdown()
+
+
+@pytest.mark.asyncio
+async def test_process_executor(dp: Dispatcher, resolve: Resolve) -> None:
+    with ProcessPoolExecutor(max_workers=1) as process_executor:
+        di_manager = setup_di(dp, process_executor=process_executor)
+
+        assert (await resolve(start, value=2))["square"] == 4
+
+        # An executor passed in is shut down by its owner.
+        await dp.emit_shutdown()
+        assert di_manager.process_executor is process_executor
+        assert (await resolve(start, value=3))["square"] == 9
+
+
+def get_generator() -> Iterator[int]:
+    yield 42
+
+
+def get_bot_id(bot: Bot) -> int:
+    return bot.id
+
+
+async def generator(
+    value: Annotated[int, Depends(get_generator, run="process")],
+) -> None:
+    pass
+
+
+async def local(
+    value: Annotated[int, Depends(lambda: 42, run="process")],
+) -> None:
+    pass
+
+
+async def bot_id(
+    value: Annotated[int, Depends(get_bot_id, run="process")],
+) -> None:
+    pass
+
+
+@pytest.mark.parametrize(
+    ("handler", "match"),
+    [
+        (generator, "plain function"),
+        (local, "pickled"),
+        (bot_id, "`bot`"),
+    ],
+)
+def test_process_invalid(
+    dp: Dispatcher, handler: Callable[..., Any], match: str
+) -> None:
+    di_manager = setup_di(dp)
+
+    with pytest.raises(ValueError, match=match):
+        di_manager.get_plan(HandlerObject(handler), ())
+
+
+def test_process_executor_invalid(dp: Dispatcher) -> None:
+    with ProcessPoolExecutor() as process_executor:
+        with pytest.raises(ValueError):
+            setup_di(dp, process_workers=1, process_executor=process_executor)
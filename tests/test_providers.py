@@ -0,0 +1,92 @@
+from abc import ABC, abstractmethod
+from typing import Annotated, Protocol
+
+import pytest
+from aiogram import Dispatcher
+from aiogram.dispatcher.event.handler import HandlerObject
+
+from aiogram3_di import Depends, setup_di
+
+from conftest import Resolve
+
+
+class Settings:
+    def __init__(self) -> None:
+        self.token = "secret"
+
+
+class Repository(ABC):
+    @abstractmethod
+    def get_name(self) -> str:
+        ...
+
+
+class UserRepository(Repository):
+    def __init__(self, settings: Annotated[Settings, Depends()]) -> None:
+        self.settings = settings
+
+    def get_name(self) -> str:
+        return "users"
+
+
+class Notifier(Protocol):
+    def notify(self, text: str) -> None:
+        ...
+
+
+class LogNotifier:
+    def notify(self, text: str) -> None:
+        pass
+
+
+def get_notifier() -> LogNotifier:
+    return LogNotifier()
+
+
+async def start(
+    settings: Annotated[Settings, Depends()],
+    repository: Annotated[Repository, Depends()],
+    notifier: Annotated[Notifier, Depends()],
+) -> None:
+    pass
+
+
+@pytest.mark.asyncio
+async def test_providers(dp: Dispatcher, resolve: Resolve) -> None:
+    di_manager = setup_di(dp)
+    di_manager.register(Settings, scope="app")
+    di_manager.register(UserRepository)
+    di_manager.register(LogNotifier, get_notifier, run="inline")
+
+    plan = di_manager.get_plan(HandlerObject(start), ())
+    assert [node.call for node in plan.nodes] == [
+        Settings,
+        UserRepository,
+        get_notifier,
+    ]
+    assert plan.nodes[0].scope == "app"
+
+    first = await resolve(start)
+    second = await resolve(start)
+
+    assert first["settings"] is second["settings"]
+    assert first["repository"].settings is first["settings"]
+    assert isinstance(first["notifier"], LogNotifier)
+
+
+def test_providers_ambiguous(dp: Dispatcher) -> None:
+    class AdminRepository(Repository):
+        def get_name(self) -> str:
+            return "admins"
+
+    di_manager = setup_di(dp)
+    di_manager.register(UserRepository)
+    di_manager.register(AdminRepository)
+
+    with pytest.raises(ValueError, match="several"):
+        di_manager.get_plan(HandlerObject(start), ())
+
+    # An exact registration wins over subclasses.
+    di_manager.register(Repository, UserRepository)
+    di_manager.register(Notifier, get_notifier)
+    assert len(di_manager.get_plan(HandlerObject(start), ()).nodes) == 3
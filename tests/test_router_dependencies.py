@@ -0,0 +1,81 @@
+from typing import Annotated
+
+import pytest
+from aiogram import Bot, Dispatcher, Router
+from aiogram.enums import ChatType
+from aiogram.types import Chat, Message, Update, User
+
+from aiogram3_di import Depends, add_dependencies, setup_di
+
+events: list[str] = []
+
+
+def check_auth() -> None:
+    events.append("auth")
+
+
+def check_rate() -> None:
+    events.append("rate")
+
+
+def check_admin() -> None:
+    events.append("admin")
+
+
+def get_user_first_name(event_from_user: User) -> str:
+    events.append("first name")
+    return event_from_user.first_name
+
+
+def make_update() -> Update:
+    user = User(id=42, is_bot=False, first_name="Vladyslav")
+    chat = Chat(id=42, type=ChatType.PRIVATE)
+    return Update(
+        update_id=1,
+        message=Message(message_id=1, date=0, chat=chat, from_user=user, text="hi"),
+    )
+
+
+@pytest.mark.asyncio
+async def test_router_dependencies(dp: Dispatcher) -> None:
+    events.clear()
+    auth = Depends(check_auth, run="inline")
+    router = Router()
+    admin_router = Router()
+    router.include_router(admin_router)
+    dp.include_router(router)
+
+    @admin_router.message(
+        flags={"dependencies": [auth, Depends(check_admin, run="inline")]}
+    )
+    async def start(
+        message: Message,
+        first_name: Annotated[str, Depends(get_user_first_name, run="inline")],
+    ) -> str:
+        return first_name
+
+    add_dependencies(dp, auth)
+    add_dependencies(admin_router.message, Depends(check_rate, run="inline"))
+    di_manager = setup_di(dp)
+
+    assert await dp.feed_update(Bot("42:TEST"), make_update()) == "Vladyslav"
+    assert events == ["auth", "rate", "admin", "first name"]
+
+    # Declarations made after the plans are compiled rebuild them.
+    plan = di_manager.get_handler_plan(admin_router.message.handlers[0], admin_router)
+    add_dependencies(router, Depends(check_rate, run="inline"))
+    assert (
+        di_manager.get_handler_plan(admin_router.message.handlers[0], admin_router)
+        is not plan
+    )
+
+    events.clear()
+    await dp.feed_update(Bot("42:TEST"), make_update())
+    assert events == ["auth", "rate", "admin", "first name"]
+
+
+def test_router_dependencies_invalid() -> None:
+    with pytest.raises(TypeError):
+        add_dependencies(Router(), check_auth)
+    with pytest.raises(TypeError):
+        add_dependencies(object(), Depends(check_auth))
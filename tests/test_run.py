@@ -0,0 +1,53 @@
+import threading
+from collections.abc import Iterator
+from typing import Annotated
+
+import pytest
+from aiogram import Dispatcher
+
+from aiogram3_di import Depends, setup_di
+
+from conftest import Resolve
+
+
+def get_thread_id() -> int:
+    return threading.get_ident()
+
+
+def get_generator_thread_id() -> Iterator[int]:
+    yield threading.get_ident()
+
+
+async def start(
+    inline_thread_id: Annotated[int, Depends(get_thread_id, run="inline")],
+    thread_id: Annotated[int, Depends(get_thread_id, run="thread", use_cache=False)],
+    generator_thread_id: Annotated[int, Depends(get_generator_thread_id)],
+) -> None:
+    pass
+
+
+@pytest.mark.asyncio
+async def test_run(dp: Dispatcher, resolve: Resolve) -> None:
+    setup_di(dp)
+
+    middleware_data = await resolve(start)
+
+    assert middleware_data["inline_thread_id"] == threading.get_ident()
+    assert middleware_data["thread_id"] != threading.get_ident()
+    assert middleware_data["generator_thread_id"] != threading.get_ident()
+
+
+@pytest.mark.asyncio
+async def test_run_default(dp: Dispatcher, resolve: Resolve) -> None:
+    setup_di(dp, run="inline")
+
+    middleware_data = await resolve(start)
+
+    assert middleware_data["inline_thread_id"] == threading.get_ident()
+    assert middleware_data["thread_id"] != threading.get_ident()
+    assert middleware_data["generator_thread_id"] == threading.get_ident()
+
+
+def test_run_invalid() -> None:
+    with pytest.raises(ValueError):
+        Depends(get_thread_id, run="fork")
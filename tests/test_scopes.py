@@ -0,0 +1,180 @@
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import AsyncExitStack
+from typing import Annotated
+
+import pytest
+from aiogram import Dispatcher
+from aiogram.enums import ChatType
+from aiogram.types import Chat
+
+from aiogram3_di import Depends, setup_di
+from aiogram3_di.scopes import ScopeStore
+
+from conftest import Resolve
+
+events: list[str] = []
+
+
+async def get_client() -> AsyncIterator[str]:
+    events.append("open client")
+    yield "client"
+    events.append("close client")
+
+
+async def get_chat_settings(
+    event_chat: Chat, client: Annotated[str, Depends(get_client)]
+) -> AsyncIterator[str]:
+    events.append(f"load settings {event_chat.id}")
+    yield f"settings {event_chat.id} from {client}"
+    events.append(f"drop settings {event_chat.id}")
+
+
+async def start(
+    client: Annotated[str, Depends(get_client, scope="app")],
+    settings: Annotated[str, Depends(get_chat_settings, scope="chat")],
+) -> None:
+    pass
+
+
+def chat(chat_id: int) -> Chat:
+    return Chat(id=chat_id, type=ChatType.PRIVATE)
+
+
+@pytest.mark.asyncio
+async def test_scopes(dp: Dispatcher, resolve: Resolve) -> None:
+    events.clear()
+    setup_di(dp, scope_max_size=1)
+
+    middleware_data = await resolve(start, event_chat=chat(1))
+    assert middleware_data["client"] == "client"
+    assert middleware_data["settings"] == "settings 1 from client"
+
+    await resolve(start, event_chat=chat(1))
+    assert events == ["open client", "open client", "load settings 1"]
+
+    await resolve(start, event_chat=chat(2))
+    assert events[3:] == [
+        "drop settings 1",
+        "close client",
+        "open client",
+        "load settings 2",
+    ]
+
+    await dp.emit_shutdown()
+    assert events[7:] == [
+        "drop settings 2",
+        "close client",
+        "close client",
+    ]
+
+
+def get_user_counter() -> str:
+    events.append("count user")
+    return "counter"
+
+
+async def count(
+    counter: Annotated[str, Depends(get_user_counter, scope="user")]
+) -> None:
+    pass
+
+
+@pytest.mark.asyncio
+async def test_scopes_without_user(dp: Dispatcher, resolve: Resolve) -> None:
+    events.clear()
+    setup_di(dp)
+
+    for _ in range(2):
+        assert (await resolve(count))["counter"] == "counter"
+
+    assert events == ["count user", "count user"]
+
+
+@pytest.mark.asyncio
+async def test_scope_store_single_flight() -> None:
+    store = ScopeStore(ttl=60)
+    calls = 0
+
+    async def factory(stack: AsyncExitStack) -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    results = await asyncio.gather(
+        *(store.get_or_create("key", factory) for _ in range(5))
+    )
+
+    assert results == [1] * 5
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_scope_store_ttl() -> None:
+    store = ScopeStore(ttl=0.01)
+    calls = 0
+
+    async def factory(stack: AsyncExitStack) -> int:
+        nonlocal calls
+        calls += 1
+        stack.callback(events.append, f"teardown {calls}")
+        return calls
+
+    events.clear()
+    assert await store.get_or_create("key", factory) == 1
+    await asyncio.sleep(0.02)
+    assert await store.get_or_create("key", factory) == 2
+    assert events == ["teardown 1"]
+
+
+@pytest.mark.asyncio
+async def test_scope_store_lease() -> None:
+    store = ScopeStore(max_size=1)
+
+    calls = 0
+
+    async def factory(stack: AsyncExitStack) -> str:
+        nonlocal calls
+        calls += 1
+        stack.callback(events.append, f"teardown {calls}")
+        return "value"
+
+    events.clear()
+    async with AsyncExitStack() as lease:
+        assert await store.get_or_create(1, factory, lease=lease) == "value"
+        await store.get_or_create(2, factory, lease=lease)
+        # The evicted value is still used by this update.
+        assert events == []
+    assert events == ["teardown 1"]
+
+    await store.close()
+    assert events == ["teardown 1", "teardown 2"]
+
+
+counter = 0
+
+
+def get_counter() -> int:
+    global counter
+    counter += 1
+    return counter
+
+
+async def count_twice(
+    update_counter: Annotated[int, Depends(get_counter, run="inline")],
+    app_counter: Annotated[int, Depends(get_counter, run="inline", scope="app")],
+) -> None:
+    pass
+
+
+@pytest.mark.asyncio
+async def test_scopes_same_call(dp: Dispatcher, resolve: Resolve) -> None:
+    global counter
+    counter = 0
+    setup_di(dp)
+
+    results = [await resolve(count_twice) for _ in range(3)]
+
+    assert [result["update_counter"] for result in results] == [1, 3, 4]
+    assert [result["app_counter"] for result in results] == [2, 2, 2]
@@ -0,0 +1,144 @@
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import AsyncExitStack
+from typing import Annotated
+
+import pytest
+from aiogram import Bot, Dispatcher
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.enums import ChatType
+from aiogram.types import Chat, Message, Update, User
+
+from aiogram3_di import Depends, setup_di
+from aiogram3_di.teardown import BackgroundTeardown
+
+from conftest import Resolve
+
+events: list[str] = []
+
+
+async def get_session() -> AsyncIterator[str]:
+    events.append("open session")
+    try:
+        yield "session"
+    except ValueError:
+        events.append("rollback session")
+        raise
+    await asyncio.sleep(0.01)
+    events.append("commit session")
+
+
+async def get_repository(
+    session: Annotated[str, Depends(get_session, teardown="background")]
+) -> AsyncIterator[str]:
+    yield f"repository of {session}"
+    events.append("close repository")
+
+
+def make_update() -> Update:
+    user = User(id=42, is_bot=False, first_name="Vladyslav")
+    chat = Chat(id=42, type=ChatType.PRIVATE)
+    return Update(
+        update_id=1,
+        message=Message(message_id=1, date=0, chat=chat, from_user=user, text="hi"),
+    )
+
+
+async def start(
+    repository: Annotated[str, Depends(get_repository)],
+) -> None:
+    pass
+
+
+@pytest.mark.asyncio
+async def test_teardown_background(dp: Dispatcher, resolve: Resolve) -> None:
+    events.clear()
+    di_manager = setup_di(dp)
+
+    middleware_data = await resolve(start)
+
+    assert middleware_data["repository"] == "repository of session"
+    assert events == ["open session", "close repository"]
+    assert di_manager.teardown.pending == 1
+
+    await dp.emit_shutdown()
+
+    assert events[2:] == ["commit session"]
+    assert di_manager.teardown.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_teardown_background_error(dp: Dispatcher) -> None:
+    events.clear()
+
+    @dp.message()
+    async def fail(
+        message: Message,
+        session: Annotated[str, Depends(get_session, teardown="background")],
+    ) -> None:
+        raise ValueError
+
+    setup_di(dp)
+
+    with pytest.raises(ValueError):
+        await dp.feed_update(Bot("42:TEST"), make_update())
+    await dp.emit_shutdown()
+
+    assert events == ["open session", "rollback session"]
+
+
+@pytest.mark.asyncio
+async def test_teardown_background_backlog() -> None:
+    teardown = BackgroundTeardown(max_pending=1)
+    release = asyncio.Event()
+
+    first, second = AsyncExitStack(), AsyncExitStack()
+    first.push_async_callback(release.wait)
+    second.callback(events.append, "second")
+
+    events.clear()
+    await teardown.submit(first, None, None, None)
+    await teardown.submit(second, None, None, None)
+
+    # The backlog is full, so the second stack is closed inline.
+    assert events == ["second"]
+    assert teardown.pending == 1
+
+    release.set()
+    await teardown.drain()
+    assert teardown.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_teardown_background_timeout(caplog: pytest.LogCaptureFixture) -> None:
+    teardown = BackgroundTeardown(timeout=0.01)
+    stack = AsyncExitStack()
+    stack.push_async_callback(asyncio.sleep, 1)
+
+    await teardown.submit(stack, None, None, None)
+    await teardown.drain()
+
+    assert "Failed to tear down" in caplog.text
+
+
+async def close_session(
+    session: Annotated[str, Depends(get_session)]
+) -> AsyncIterator[str]:
+    yield session
+
+
+async def invalid(
+    value: Annotated[str, Depends(close_session, teardown="background")]
+) -> None:
+    pass
+
+
+def test_teardown_invalid(dp: Dispatcher) -> None:
+    with pytest.raises(ValueError):
+        Depends(get_session, teardown="later")
+    with pytest.raises(ValueError):
+        Depends(get_session, teardown="background", scope="chat")
+
+    di_manager = setup_di(dp)
+    with pytest.raises(ValueError):
+        di_manager.get_plan(HandlerObject(invalid), ())
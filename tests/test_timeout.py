@@ -0,0 +1,84 @@
+import asyncio
+import threading
+from collections.abc import AsyncIterator
+from typing import Annotated
+
+import pytest
+from aiogram import Dispatcher
+
+from aiogram3_di import Depends, DependencyTimeoutError, setup_di
+
+from conftest import Resolve
+
+events: list[str] = []
+release = threading.Event()
+
+
+async def get_session() -> AsyncIterator[str]:
+    events.append("open session")
+    try:
+        yield "session"
+    finally:
+        events.append("close session")
+
+
+async def get_hanging(session: Annotated[str, Depends(get_session)]) -> str:
+    await asyncio.sleep(1)
+    return "hanging"
+
+
+def get_blocking() -> str:
+    release.wait(1)
+    return "blocking"
+
+
+async def hang(
+    session: Annotated[str, Depends(get_session)],
+    value: Annotated[str, Depends(get_hanging, timeout=0.01)],
+) -> None:
+    pass
+
+
+async def degrade(
+    value: Annotated[str, Depends(get_hanging, timeout=0.01, fallback="fallback")],
+) -> None:
+    pass
+
+
+async def block(value: Annotated[str, Depends(get_blocking)]) -> None:
+    pass
+
+
+@pytest.mark.asyncio
+async def test_timeout(dp: Dispatcher, resolve: Resolve) -> None:
+    events.clear()
+    setup_di(dp)
+
+    with pytest.raises(DependencyTimeoutError):
+        await resolve(hang)
+
+    assert events == ["open session", "close session"]
+
+
+@pytest.mark.asyncio
+async def test_timeout_fallback(dp: Dispatcher, resolve: Resolve) -> None:
+    setup_di(dp)
+
+    assert (await resolve(degrade))["value"] == "fallback"
+
+
+@pytest.mark.asyncio
+async def test_timeout_default(dp: Dispatcher, resolve: Resolve) -> None:
+    release.clear()
+    setup_di(dp, timeout=0.01)
+
+    with pytest.raises(DependencyTimeoutError):
+        await resolve(block)
+    release.set()
+
+
+def test_timeout_invalid(dp: Dispatcher) -> None:
+    with pytest.raises(ValueError):
+        Depends(get_blocking, timeout=0)
+    with pytest.raises(ValueError):
+        setup_di(dp, timeout=-1)
@@ -0,0 +1,130 @@
+from typing import Annotated
+
+import pytest
+from aiogram import Bot, Dispatcher
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.types import Chat, TelegramObject, User
+
+from aiogram3_di import (
+    DependencyCycleError,
+    DependencyGraphError,
+    Depends,
+    setup_di,
+    validate_graph,
+)
+from aiogram3_di.utils import get_dependencies
+from aiogram3_di.validation import main
+
+
+def get_a(b: str) -> str:
+    return b
+
+
+def get_b(a: Annotated[str, Depends(get_a)]) -> str:
+    return a
+
+
+get_a.__annotations__["b"] = Annotated[str, Depends(get_b)]
+
+
+async def cyclic(b: Annotated[str, Depends(get_b)]) -> None:
+    pass
+
+
+def get_chat_id(event_chat: Chat) -> int:
+    return event_chat.id
+
+
+def get_user_id(event_from_user: User) -> int:
+    return event_from_user.id
+
+
+def get_user_settings(
+    user_id: Annotated[int, Depends(get_user_id, scope="user")],
+    chat_id: Annotated[int, Depends(get_chat_id)],
+) -> str:
+    return f"{user_id} in {chat_id}"
+
+
+def get_config(event: TelegramObject, settings_path: str) -> str:
+    return settings_path
+
+
+async def misscoped(
+    settings: Annotated[str, Depends(get_user_settings, scope="chat")],
+    config: Annotated[str, Depends(get_config, scope="app")],
+) -> None:
+    pass
+
+
+async def valid(
+    user_id: Annotated[int, Depends(get_user_id, scope="user")],
+    chat_id: Annotated[int, Depends(get_chat_id, scope="chat")],
+) -> None:
+    pass
+
+
+def test_validate_cycle(dp: Dispatcher) -> None:
+    dp.message.register(cyclic)
+    with pytest.raises(DependencyGraphError, match="dependency cycle"):
+        setup_di(dp)
+    di_manager = dp["di_manager"]
+
+    with pytest.raises(DependencyCycleError, match="get_b -> get_a -> get_b"):
+        di_manager.get_plan(HandlerObject(cyclic), ())
+    with pytest.raises(DependencyCycleError):
+        list(get_dependencies({"b": cyclic.__annotations__["b"]}))
+
+    (issue,) = validate_graph(dp, di_manager)
+    assert issue.kind == "cycle"
+    assert issue.path == (
+        "test_validation.get_b",
+        "test_validation.get_a",
+        "test_validation.get_b",
+    )
+
+
+def test_validate_unresolved_and_scope(dp: Dispatcher) -> None:
+    dp.message.register(misscoped)
+    dp.message.register(valid)
+    di_manager = setup_di(dp)
+
+    issues = validate_graph(dp, di_manager)
+    assert sorted((issue.kind, issue.path[-1], issue.message) for issue in issues) == [
+        ("scope", "test_validation.get_config", "`event` used in app scope"),
+        (
+            "scope",
+            "test_validation.get_user_id",
+            "user scoped dependency used by a chat scoped one",
+        ),
+        (
+            "unresolved",
+            "test_validation.get_config",
+            "`settings_path` is not provided by middleware data",
+        ),
+    ]
+    assert str(issues[0]).startswith("test_validation.misscoped -> ")
+
+    assert len(validate_graph(dp, di_manager, known_params=["settings_path"])) == 2
+
+
+@pytest.mark.asyncio
+async def test_validate_on_startup(dp: Dispatcher) -> None:
+    dp.message.register(misscoped)
+    setup_di(dp, validate=True)
+
+    with pytest.raises(DependencyGraphError) as exc_info:
+        await dp.emit_startup(bot=Bot("42:TEST"), settings_path="settings.toml")
+    assert len(exc_info.value.errors) == 2
+
+
+cli_dp = Dispatcher()
+cli_dp.message.register(valid)
+
+
+def test_validate_cli(capsys: pytest.CaptureFixture[str]) -> None:
+    assert main(["test_validation:cli_dp"]) == 0
+
+    cli_dp.message.register(misscoped)
+    assert main(["test_validation:cli_dp", "--known-param", "settings_path"]) == 1
+    assert len(capsys.readouterr().out.splitlines()) == 2
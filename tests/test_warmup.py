@@ -0,0 +1,81 @@
+from collections.abc import AsyncIterator
+from typing import Annotated
+
+import pytest
+from aiogram import Bot, Dispatcher, Router
+from aiogram.types import Message, TelegramObject
+
+from aiogram3_di import DependencyGraphError, Depends, setup_di
+
+from conftest import Resolve
+
+events: list[str] = []
+
+
+async def get_client(bot: Bot) -> AsyncIterator[str]:
+    events.append("open client")
+    yield f"client of {bot.id}"
+    events.append("close client")
+
+
+def get_event_type(event: TelegramObject) -> str:
+    events.append("get event type")
+    return type(event).__name__
+
+
+async def start(
+    client: Annotated[str, Depends(get_client, scope="app")],
+    event_type: Annotated[str, Depends(get_event_type, scope="app", run="inline")],
+) -> None:
+    pass
+
+
+@pytest.mark.asyncio
+async def test_warmup(dp: Dispatcher, resolve: Resolve) -> None:
+    events.clear()
+    dp.message.register(start)
+    setup_di(dp, eager=True)
+    bot = Bot("42:TEST")
+
+    await dp.emit_startup(bot=bot)
+    assert events == ["open client"]
+
+    middleware_data = await resolve(start, bot=bot)
+    assert middleware_data["client"] == "client of 42"
+    assert events == ["open client", "get event type"]
+
+    await dp.emit_shutdown()
+    assert events[2:] == ["close client"]
+
+
+async def get_user_id(event: TelegramObject) -> int:
+    return 42
+
+
+async def broken(
+    user_id: Annotated[int, Depends(get_user_id, cache_ttl=30)],
+) -> None:
+    pass
+
+
+@pytest.mark.asyncio
+async def test_warmup_router_included_later(dp: Dispatcher) -> None:
+    setup_di(dp, allowed_updates=["message"], eager=True)
+    router = Router()
+    router.message.register(broken)
+    dp.include_router(router)
+
+    with pytest.raises(DependencyGraphError, match="broken"):
+        await dp.emit_startup(bot=Bot("42:TEST"))
+
+
+def test_compile_plans_errors(dp: Dispatcher) -> None:
+    async def echo(message: Message) -> None:
+        pass
+
+    dp.message.register(echo)
+    dp.message.register(broken)
+
+    with pytest.raises(DependencyGraphError) as exc_info:
+        setup_di(dp)
+    assert len(exc_info.value.errors) == 1